@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.db import connection
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from authentication.cache import user_cache
+
+
+class ActivationTokenGenerator(PasswordResetTokenGenerator):
+    """
+    Timestamped hmac over the user state, valid for PASSWORD_RESET_TIMEOUT.
+
+    date_modified is part of the hashed value. Activating moves it forward
+    and it never goes back, so a token stops working once the account has
+    been activated, even if the account is deactivated again later.
+    """
+
+    key_salt = "authentication.activation.ActivationTokenGenerator"
+
+    def _make_hash_value(self, user, timestamp):
+        return (
+            f'{super()._make_hash_value(user, timestamp)}'
+            f'{user.date_modified.isoformat()}'
+        )
+
+
+activation_token_generator = ActivationTokenGenerator()
+
+
+def make_activation_token(user):
+    """self contained token carrying the user id, nothing is stored"""
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    return f'{uid}.{activation_token_generator.make_token(user)}'
+
+
+def activate_user(token):
+    """activate the account of a signed token, returns the user id or None"""
+    user_id = decode_user_id(token)
+
+    if user_id is None:
+        return None
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+
+    if not check_activation_token(user, token):
+        return None
+
+    activated = get_user_model().objects.filter(
+        pk=user_id,
+        is_active=False
+    ).update(is_active=True, date_modified=timezone.now())
+
+    if not activated:
+        return None
+
+    user_cache.invalidate(user_id)
+
+    return user_id
+
+
+async def aactivate_user(token):
+    user_id = decode_user_id(token)
+
+    if user_id is None:
+        return None
+
+    user = await get_user_model().objects.filter(pk=user_id).afirst()
+
+    if not check_activation_token(user, token):
+        return None
+
+    activated = await get_user_model().objects.filter(
+        pk=user_id,
+        is_active=False
+    ).aupdate(is_active=True, date_modified=timezone.now())
+
+    if not activated:
+        return None
+
+    await user_cache.ainvalidate(user_id)
+
+    return user_id
+
+
+def decode_user_id(token):
+    uid, _, _ = token.partition('.')
+
+    try:
+        user_id = int(urlsafe_base64_decode(uid))
+    except (TypeError, ValueError):
+        return None
+
+    """an id the primary key column cannot hold fails the lookup"""
+    low, high = connection.ops.integer_field_range(
+        get_user_model()._meta.pk.get_internal_type()
+    )
+
+    if not low <= user_id <= high:
+        return None
+
+    return user_id
+
+
+def check_activation_token(user, token):
+    _, _, user_token = token.partition('.')
+
+    return user is not None and activation_token_generator.check_token(
+        user,
+        user_token
+    )
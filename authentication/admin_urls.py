@@ -1,5 +1,8 @@
 from django.urls import path
 from authentication.views import (
+    AdminBulkUserUpdate,
+    AdminUserExport,
+    AdminUserList,
     LoginAdminUser,
     RefreshAdminUser,
     LogoutAdminUser
@@ -13,4 +16,11 @@ urlpatterns = [
     path('login/', LoginAdminUser.as_view(), name='login'),
     path('logout/', LogoutAdminUser.as_view(), name='logout'),
     path('refresh/', RefreshAdminUser.as_view(), name='refresh'),
+    path('users/', AdminUserList.as_view(), name='users'),
+    path('users/bulk/', AdminBulkUserUpdate.as_view(), name='users-bulk'),
+    path(
+        'users/export/<str:kind>/',
+        AdminUserExport.as_view(),
+        name='users-export'
+    ),
 ]
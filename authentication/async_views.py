@@ -0,0 +1,174 @@
+from authentication.serializer import (
+    UserModelSerializer,
+    TokenSerializer,
+    OtpSerializer,
+    OtpSerializerEmailOnly,
+    OtpSerializerPassword,
+    UserTokenObtainPairSerializer,
+    UserTokenRefreshSerializer,
+    SessionSerializer,
+    SessionsRevokedSerializer,
+)
+from authentication.authenticate import CachedJWTAuthentication
+from authentication.sessions import (
+    arevoke_sessions,
+    asession_values,
+    live_sessions
+)
+from authentication.throttling import SlidingWindowScopedThrottle
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework import status
+from rest_framework_simplejwt.settings import api_settings
+from core.async_views import AsyncAPIView
+
+
+class TokenView(AsyncAPIView):
+    """challenge failed logins like the simplejwt token views"""
+
+    www_authenticate_realm = "api"
+
+    def get_authenticate_header(self, request):
+        return '{} realm="{}"'.format(
+            api_settings.AUTH_HEADER_TYPES[0],
+            self.www_authenticate_realm,
+        )
+
+    async def post(self, request):
+        serializer = self.get_serializer(data=self.data)
+        await serializer.ais_valid(raise_exception=True)
+
+        return self.response(serializer.validated_data)
+
+
+class LoginUserTokenView(TokenView):
+    """login user and send tokens"""
+
+    serializer_class = UserTokenObtainPairSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "login"
+
+
+class RefreshTokenPair(TokenView):
+    """refresh the tokens"""
+
+    serializer_class = UserTokenRefreshSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "refresh"
+
+
+class RegisterUser(AsyncAPIView):
+    """register new accounts"""
+
+    serializer_class = UserModelSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "register"
+
+    async def post(self, request):
+        serializer = self.get_serializer(data=self.data)
+        await serializer.ais_valid(raise_exception=True)
+        await serializer.asave()
+
+        return self.response(
+            serializer.data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class VerifyAndActivateAccount(AsyncAPIView):
+    serializer_class = TokenSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "verify"
+
+    async def post(self, request):
+        """verify the token and activate the account"""
+        serializer = self.get_serializer(data=self.data)
+        await serializer.ais_valid(raise_exception=True)
+
+        return self.response({"message": "Account activated successfully"})
+
+
+class ForgotPassword(AsyncAPIView):
+    """generate and verify otp then change the password of the user"""
+
+    serializer_class = OtpSerializerEmailOnly
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "forgot"
+
+    async def post(self, request):
+        """get the email of the user and generate otp"""
+        serializer = self.get_serializer(data=self.data)
+        await serializer.ais_valid(raise_exception=True)
+
+        return self.response({"message": "Otp generated successfully"})
+
+
+class ForgotPasswordVerifyOtp(AsyncAPIView):
+    """verify the otp"""
+
+    serializer_class = OtpSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "forgot"
+
+    async def post(self, request):
+        """verify the otp"""
+        serializer = self.get_serializer(data=self.data)
+        await serializer.ais_valid(raise_exception=True)
+
+        return self.response({"message": "Otp verified successfully"})
+
+
+class ForgotPasswordUpdate(AsyncAPIView):
+    """update the password"""
+
+    serializer_class = OtpSerializerPassword
+    permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowScopedThrottle]
+    throttle_scope = "forgot"
+
+    async def patch(self, request):
+        """update the password"""
+        serializer = self.get_serializer(data=self.data)
+        await serializer.ais_valid(raise_exception=True)
+
+        return self.response({"message": "Password updated"})
+
+
+class UserSessions(AsyncAPIView):
+    """list the live sessions of the user or revoke all of them"""
+
+    serializer_class = SessionSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        sessions = await asession_values(live_sessions(user=request.user))
+        return self.response(self.get_serializer(sessions, many=True).data)
+
+    async def delete(self, request):
+        revoked = await arevoke_sessions(live_sessions(user=request.user))
+        return self.response({"revoked": revoked})
+
+
+class UserSession(AsyncAPIView):
+    """revoke one session of the user"""
+
+    serializer_class = SessionsRevokedSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    async def delete(self, request, pk):
+        revoked = await arevoke_sessions(
+            live_sessions(user=request.user, pk=pk)
+        )
+
+        if not revoked:
+            raise NotFound()
+
+        return self.response({"revoked": revoked})
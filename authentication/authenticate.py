@@ -1,8 +1,99 @@
 from rest_framework_simplejwt import authentication as jwt_authentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from django.conf import settings
+from django.utils.functional import cached_property
+from authentication.cache import user_cache
+from authentication.helper import USER_CLAIMS
 
 
-class CustomAuthentication(jwt_authentication.JWTAuthentication):
+class CachedJWTAuthentication(jwt_authentication.JWTAuthentication):
+    """resolve the token user through the user cache"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+
+        if user_id is None:
+            """let simplejwt raise the usual error"""
+            return super().get_user(validated_token)
+
+        user = user_cache.get(user_id)
+
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+            return user
+
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views"""
+        header = self.get_header(request)
+
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+
+        if user_id is None:
+            raise InvalidToken(
+                "Token contained no recognizable user identification"
+            )
+
+        user = await user_cache.aget(user_id)
+
+        if user is None:
+            user = await self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).afirst()
+
+            if user is None:
+                raise AuthenticationFailed(
+                    "User not found",
+                    code="user_not_found"
+                )
+
+            user = self.check_user(user, validated_token)
+            await user_cache.aset(user_id, user)
+            return user
+
+        return self.check_user(user, validated_token)
+
+    def check_user(self, user, validated_token):
+        """the checks simplejwt runs after loading the user"""
+        if not user.is_active:
+            raise AuthenticationFailed(
+                "User is inactive",
+                code="user_inactive"
+            )
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    "The user's password has been changed.",
+                    code="password_changed"
+                )
+
+        return user
+
+
+class CustomAuthentication(CachedJWTAuthentication):
     def authenticate(self, request):
         raw_token = (
             request.COOKIES.get(settings.SIMPLE_JWT['AUTH_COOKIE']) or None
@@ -13,3 +104,56 @@ class CustomAuthentication(jwt_authentication.JWTAuthentication):
 
         validated_token = self.get_validated_token(raw_token)
         return self.get_user(validated_token), validated_token
+
+    async def aauthenticate(self, request):
+        raw_token = (
+            request.COOKIES.get(settings.SIMPLE_JWT['AUTH_COOKIE']) or None
+        )
+
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+
+class ClaimsUser(TokenUser):
+    """lightweight user built from the claims embedded in the token"""
+
+    def __str__(self):
+        return self.email
+
+    @cached_property
+    def is_active(self):
+        return self.token.get("is_active", False)
+
+    @cached_property
+    def is_admin(self):
+        return self.token.get("is_admin", False)
+
+    @cached_property
+    def is_staff(self):
+        return self.is_admin
+
+
+class StatelessAuthentication(CachedJWTAuthentication):
+    """
+    Build the user from the token claims without touching the database.
+
+    Tokens issued before EMBED_USER_CLAIMS was enabled carry only the user
+    id, those are still resolved through the user cache.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+
+        if not user.is_active:
+            raise AuthenticationFailed(
+                "User is inactive",
+                code="user_inactive"
+            )
+
+        return user
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from authentication.cache import user_cache
+from authentication.models import TokenFamily
+from authentication.sessions import blacklist_tokens
+from authentication.signals import users_bulk_updated
+
+
+def update_users(queryset, values, logout=False):
+    """
+    Set values on every user of the queryset and optionally revoke their
+    refresh tokens, with one statement each.
+
+    No post_save is sent, users_bulk_updated is sent once instead.
+    Returns the affected row counts.
+    """
+    counts = {"updated": 0, "blacklisted": 0, "families_revoked": 0}
+
+    with transaction.atomic():
+        """the ids are needed for the user cache and the signal"""
+        user_ids = list(
+            queryset.select_for_update().values_list('pk', flat=True)
+        )
+
+        """revoke first, the update may change what the filters match"""
+        if logout:
+            counts["blacklisted"] = blacklist_tokens(
+                OutstandingToken.objects.filter(
+                    user__in=queryset,
+                    expires_at__gt=timezone.now()
+                )
+            )
+            counts["families_revoked"] = TokenFamily.objects.filter(
+                user__in=queryset,
+                is_revoked=False
+            ).update(is_revoked=True, date_modified=timezone.now())
+
+        if values:
+            counts["updated"] = queryset.update(
+                **values,
+                date_modified=timezone.now()
+            )
+
+        def after_commit():
+            for user_id in user_ids:
+                user_cache.invalidate(user_id)
+
+            users_bulk_updated.send(
+                sender=get_user_model(),
+                user_ids=user_ids,
+                values=values,
+                logged_out=logout
+            )
+
+        transaction.on_commit(after_commit)
+
+    return counts
+
@@ -0,0 +1,164 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+
+class UserCache:
+    """
+    Bounded, TTL based cache of users keyed by the jwt user claim.
+
+    Entries live in a per process dict by default. When a cache alias is
+    given as backend the entries are stored there instead so every worker
+    shares them and invalidation reaches all of them. With the per process
+    dict a change made by one worker reaches the others only after ttl.
+    """
+
+    key_prefix = "user-cache"
+
+    def __init__(self, enabled=True, max_size=1024, ttl=30, lru=True,
+                 backend=None):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lru = lru
+        self.backend = backend
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        """build the cache from the USER_CACHE setting"""
+        options = settings.USER_CACHE
+        return cls(
+            enabled=options["ENABLED"],
+            max_size=options["MAX_SIZE"],
+            ttl=options["TTL"],
+            lru=options["LRU"],
+            backend=options["BACKEND"],
+        )
+
+    def make_key(self, user_id):
+        return f"{self.key_prefix}:{user_id}"
+
+    def get(self, user_id):
+        """return a private copy of the cached user or None"""
+        if not self.enabled:
+            return None
+
+        if self.backend:
+            user = caches[self.backend].get(self.make_key(user_id))
+        else:
+            user = self._get_local(user_id)
+
+        with self._lock:
+            if user is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if user is not None and not self.backend:
+            """callers may mutate the user, never hand out the shared one"""
+            user = copy.copy(user)
+
+        return user
+
+    async def aget(self, user_id):
+        """get() that awaits a shared backend"""
+        if not self.enabled or not self.backend:
+            return self.get(user_id)
+
+        user = await caches[self.backend].aget(self.make_key(user_id))
+
+        with self._lock:
+            if user is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return user
+
+    def set(self, user_id, user):
+        if not self.enabled:
+            return
+
+        if self.backend:
+            caches[self.backend].set(
+                self.make_key(user_id),
+                user,
+                timeout=self.ttl
+            )
+            return
+
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def aset(self, user_id, user):
+        if not self.enabled or not self.backend:
+            return self.set(user_id, user)
+
+        await caches[self.backend].aset(
+            self.make_key(user_id),
+            user,
+            timeout=self.ttl
+        )
+
+    def invalidate(self, user_id):
+        if self.backend:
+            caches[self.backend].delete(self.make_key(user_id))
+
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    async def ainvalidate(self, user_id):
+        if self.backend:
+            await caches[self.backend].adelete(self.make_key(user_id))
+
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """hit/miss counters of this process"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def _get_local(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+
+            if entry is None:
+                return None
+
+            expires_at, user = entry
+
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+
+            if self.lru:
+                self._entries.move_to_end(user_id)
+
+            return user
+
+
+user_cache = UserCache.from_settings()
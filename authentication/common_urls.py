@@ -1,20 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from authentication.views import (
-    ForgotPassword,
-    ForgotPasswordVerifyOtp,
-    ForgotPasswordUpdate
-)
+
+if settings.ASYNC_API:
+    from authentication import async_views as views
+else:
+    from authentication import views
 
 
 app_name = "authentication_common"
 
 
 urlpatterns = [
-    path('forgot-password/', ForgotPassword.as_view(), name='forgot-password'),
-    path('verify-otp/', ForgotPasswordVerifyOtp.as_view(), name='verify-otp'),
+    path(
+        'forgot-password/',
+        views.ForgotPassword.as_view(),
+        name='forgot-password'
+    ),
+    path(
+        'verify-otp/',
+        views.ForgotPasswordVerifyOtp.as_view(),
+        name='verify-otp'
+    ),
     path(
         'reset-password/',
-        ForgotPasswordUpdate.as_view(),
+        views.ForgotPasswordUpdate.as_view(),
         name='reset-password'
     ),
 ]
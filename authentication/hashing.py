@@ -0,0 +1,118 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    make_password,
+    must_update_salt,
+    verify_password
+)
+
+
+class CalibratedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """pbkdf2 using the iteration count picked by calibratehasher"""
+
+    @property
+    def iterations(self):
+        return (
+            settings.PASSWORD_HASHING["ITERATIONS"]
+            or PBKDF2PasswordHasher.iterations
+        )
+
+    def must_update(self, encoded):
+        """
+        Upgrade hashes below the iteration count or with a short salt, like
+        django does. Lowering the count, e.g. calibrating on a faster
+        machine, keeps the stronger hashes.
+        """
+        decoded = self.decode(encoded)
+        return (
+            decoded["iterations"] < self.iterations
+            or must_update_salt(decoded["salt"], self.salt_entropy)
+        )
+
+
+class PasswordHasherPool:
+    """
+    Hash and verify passwords on a pool of worker processes.
+
+    With no workers the work happens on the calling thread. The async entry
+    points never block the event loop.
+    """
+
+    def __init__(self, workers=0):
+        self.workers = workers
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(workers=settings.PASSWORD_HASHING["WORKERS"])
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+
+        return self._executor
+
+    def make_password(self, password):
+        if not self.workers:
+            return make_password(password)
+
+        return self.executor.submit(make_password, password).result()
+
+    def verify_password(self, password, encoded):
+        """returns whether the password matches and whether to rehash it"""
+        if not self.workers:
+            return verify_password(password, encoded)
+
+        return self.executor.submit(
+            verify_password,
+            password,
+            encoded
+        ).result()
+
+    def make_passwords(self, passwords):
+        """hash many passwords at once, spread over the workers"""
+        if not self.workers:
+            return [make_password(password) for password in passwords]
+
+        return list(self.executor.map(
+            make_password,
+            passwords,
+            chunksize=max(len(passwords) // (self.workers * 4), 1)
+        ))
+
+    async def amake_password(self, password):
+        if not self.workers:
+            return await sync_to_async(make_password)(password)
+
+        return await asyncio.wrap_future(
+            self.executor.submit(make_password, password)
+        )
+
+    async def averify_password(self, password, encoded):
+        if not self.workers:
+            return await sync_to_async(verify_password)(password, encoded)
+
+        return await asyncio.wrap_future(
+            self.executor.submit(verify_password, password, encoded)
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+password_hasher = PasswordHasherPool.from_settings()
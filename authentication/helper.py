@@ -1,8 +1,49 @@
-from rest_framework_simplejwt import tokens
+from django.conf import settings
+from authentication.tokens import (
+    AsyncRefreshToken,
+    FamilyRefreshToken,
+    IndexedRefreshToken
+)
+
+
+USER_CLAIMS = ("email", "is_active", "is_admin", "is_superuser", "full_name")
+
+
+def add_user_claims(token, user):
+    """embed the fields needed for authorization when enabled"""
+    if settings.SIMPLE_JWT["EMBED_USER_CLAIMS"]:
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+
+    return token
+
+
+def get_refresh_token_class():
+    if settings.SIMPLE_JWT["REFRESH_TOKEN_FAMILIES"]:
+        return FamilyRefreshToken
+
+    if settings.SIMPLE_JWT["REVOCATION_INDEX"]:
+        return IndexedRefreshToken
+
+    return AsyncRefreshToken
 
 
 def get_user_tokens(user):
-    refresh = tokens.RefreshToken.for_user(user)
+    refresh = add_user_claims(
+        get_refresh_token_class().for_user(user),
+        user
+    )
+    return {
+        "refresh_token": str(refresh),
+        "access_token": str(refresh.access_token)
+    }
+
+
+async def aget_user_tokens(user):
+    refresh = add_user_claims(
+        await get_refresh_token_class().afor_user(user),
+        user
+    )
     return {
         "refresh_token": str(refresh),
         "access_token": str(refresh.access_token)
@@ -10,4 +51,22 @@ def get_user_tokens(user):
 
 
 def refresh_token(token):
-    return tokens.RefreshToken(token)
+    return get_refresh_token_class()(token)
+
+
+async def arefresh_token(token):
+    return await get_refresh_token_class().afrom_token(token)
+
+
+def rotate_user_tokens(token, user):
+    """retire the given refresh token and issue the next pair"""
+    if settings.SIMPLE_JWT["REFRESH_TOKEN_FAMILIES"]:
+        token.rotate()
+        refresh = add_user_claims(token, user)
+        return {
+            "refresh_token": str(refresh),
+            "access_token": str(refresh.access_token)
+        }
+
+    token.blacklist()
+    return get_user_tokens(user)
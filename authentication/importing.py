@@ -0,0 +1,212 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+from authentication.activation import make_activation_token
+from authentication.models import Tokens
+from authentication.serializer import UserModelSerializer
+from authentication.signals import notify_users_created
+
+
+class UserRowSerializer(UserModelSerializer):
+    """registration's field checks, uniqueness is checked per batch"""
+    unique_validators = False
+
+
+class UserImport:
+    """
+    Create users from imported rows in batches.
+
+    bulk_create skips post_save, so the verification tokens and the
+    user_created notifications of a batch are created here, in the same
+    transaction as its users. Rows failing the field validation of
+    registration, or repeating an email or phone of an existing user or of
+    an earlier row, are rejected.
+    """
+
+    fields = ('first_name', 'last_name', 'email', 'phone', 'password')
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+        self.user_model = get_user_model()
+
+        self.created = 0
+        self.rejected = []
+
+        self._emails = set()
+        self._phones = set()
+        self._fields = UserRowSerializer().fields
+
+    def add(self, rows):
+        """rows are (line, dict) pairs, returns the number of users created"""
+        rows = self.check(rows)
+
+        if not rows:
+            return 0
+
+        passwords = self.hasher.make_passwords(
+            [row['password'] for _, row in rows]
+        )
+        users = [
+            (line, self.user_model(
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                email=row['email'],
+                phone=row['phone'],
+                password=password,
+            ))
+            for (line, row), password in zip(rows, passwords)
+        ]
+
+        try:
+            created = self.create(users)
+        except IntegrityError:
+            """someone registered one of the emails or phones meanwhile"""
+            created = self.create_each(self.reject_existing(users))
+
+        self.created += created
+
+        return created
+
+    def check(self, rows):
+        valid = []
+
+        for line, row in rows:
+            errors = self.validate(row)
+
+            if errors:
+                self.reject(line, errors)
+                continue
+
+            row['email'] = self.user_model.objects.normalize_email(
+                row['email']
+            )
+
+            if row['email'].lower() in self._emails:
+                self.reject(line, f"duplicate email {row['email']}")
+                continue
+
+            if row['phone'] in self._phones:
+                self.reject(line, f"duplicate phone {row['phone']}")
+                continue
+
+            self._emails.add(row['email'].lower())
+            self._phones.add(row['phone'])
+            valid.append((line, row))
+
+        existing = self.existing(
+            [row['email'] for _, row in valid],
+            [row['phone'] for _, row in valid]
+        )
+
+        return [
+            (line, row) for line, row in valid
+            if not self.is_existing(line, row, existing)
+        ]
+
+    def validate(self, row):
+        """clean the fields of the row in place, returns the errors"""
+        errors = []
+
+        for name in self.fields:
+            try:
+                row[name] = self._fields[name].run_validation(
+                    row.get(name, empty)
+                )
+            except ValidationError as exc:
+                errors.extend(f"{name}: {message}" for message in exc.detail)
+
+        return '; '.join(errors)
+
+    def existing(self, emails, phones):
+        """emails, lowercased, and phones already taken in the database"""
+        taken = self.user_model.objects.filter(
+            Q(pk__in=self.user_model.objects.by_email(*emails).values('pk'))
+            | Q(phone__in=phones)
+        ).values_list('email', 'phone')
+
+        return (
+            {email.lower() for email, _ in taken},
+            {phone for _, phone in taken}
+        )
+
+    def is_existing(self, line, row, existing):
+        emails, phones = existing
+
+        if row['email'].lower() in emails:
+            self.reject(line, f"email {row['email']} is already registered")
+            return True
+
+        if row['phone'] in phones:
+            self.reject(line, f"phone {row['phone']} is already registered")
+            return True
+
+        return False
+
+    def reject_existing(self, users):
+        for _, user in users:
+            """drop keys handed out by the rolled back insert"""
+            user.pk = None
+
+        existing = self.existing(
+            [user.email for _, user in users],
+            [user.phone for _, user in users]
+        )
+
+        return [
+            (line, user) for line, user in users
+            if not self.is_existing(
+                line,
+                {'email': user.email, 'phone': user.phone},
+                existing
+            )
+        ]
+
+    def create(self, users):
+        users = [user for _, user in users]
+
+        with transaction.atomic():
+            self.user_model.objects.bulk_create(users)
+
+            if settings.SIGNED_ACTIVATION_TOKENS:
+                tokens = [make_activation_token(user) for user in users]
+            else:
+                tokens = [
+                    default_token_generator.make_token(user)
+                    for user in users
+                ]
+                Tokens.objects.bulk_create([
+                    Tokens(token=token, user=user)
+                    for token, user in zip(tokens, users)
+                ])
+
+            notify_users_created(tokens)
+
+        return len(users)
+
+    def create_each(self, users):
+        """
+        Create the users one transaction each, rejecting the rows that still
+        conflict, so a second race neither aborts the import nor loses the
+        rows committed before it.
+        """
+        created = 0
+
+        for line, user in users:
+            try:
+                created += self.create([(line, user)])
+            except IntegrityError:
+                user.pk = None
+                self.reject(
+                    line,
+                    f"email {user.email} or phone {user.phone} "
+                    "is already registered"
+                )
+
+        return created
+
+    def reject(self, line, reason):
+        self.rejected.append((line, reason))
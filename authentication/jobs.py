@@ -0,0 +1,27 @@
+from authentication.purge import (
+    Purge,
+    expired_otps,
+    expired_refresh_tokens,
+    outbox_entries,
+    used_tokens
+)
+
+
+def purge(querysets):
+    return sum(Purge(queryset).run() for _, queryset in querysets)
+
+
+def delete_expired_otps():
+    return purge(expired_otps())
+
+
+def delete_used_tokens():
+    return purge(used_tokens())
+
+
+def delete_expired_refresh_tokens():
+    return purge(expired_refresh_tokens())
+
+
+def delete_outbox_entries():
+    return purge(outbox_entries())
@@ -0,0 +1,193 @@
+import atexit
+import logging
+import os
+import threading
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """
+    Buffer last_login per user and write the buffer in batches.
+
+    A login only stores its time in a dict. A background thread writes the
+    buffered users every flush interval with one UPDATE ... CASE per batch,
+    so last_login lags by at most that interval. Repeated logins of a user
+    within the interval are written once. The buffer is flushed early when
+    it reaches max_pending users and when the process exits.
+
+    Only the app server starts the recorder. Until then, and after stop(),
+    a login writes its last_login right away. A process forked from a
+    started one, like a worker of a preloading server, starts its own
+    thread on its first login.
+    """
+
+    def __init__(self, flush_interval=5, max_pending=10000, batch_size=500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+
+        self._started = False
+        self._stopped = False
+        self._reset()
+
+        os.register_at_fork(after_in_child=self._reset)
+
+    @classmethod
+    def from_settings(cls):
+        options = settings.LAST_LOGIN
+        return cls(
+            flush_interval=options["FLUSH_INTERVAL"],
+            max_pending=options["MAX_PENDING"],
+            batch_size=options["BATCH_SIZE"],
+        )
+
+    @property
+    def running(self):
+        return self._started and not self._stopped
+
+    def record(self, user_id, when=None):
+        when = when or timezone.now()
+
+        if not self.running:
+            self.write([(user_id, when)])
+            return
+
+        self._start_thread()
+
+        if self.buffer(user_id, when):
+            self._event.set()
+
+    async def arecord(self, user_id, when=None):
+        when = when or timezone.now()
+
+        if not self.running:
+            await self.awrite([(user_id, when)])
+            return
+
+        self._start_thread()
+
+        if self.buffer(user_id, when):
+            self._event.set()
+
+    def buffer(self, user_id, when):
+        """keep the latest login of the user, returns whether it is full"""
+        with self._lock:
+            previous = self._pending.get(user_id)
+
+            if previous is None or when > previous:
+                self._pending[user_id] = when
+
+            return len(self._pending) >= self.max_pending
+
+    def flush(self):
+        """write the buffered timestamps, returns the number of rows"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        entries = list(pending.items())
+        written = 0
+
+        try:
+            for start in range(0, len(entries), self.batch_size):
+                written += self.write(
+                    entries[start:start + self.batch_size]
+                )
+        except Exception:
+            """keep the entries for the next flush"""
+            for user_id, when in entries:
+                self.buffer(user_id, when)
+            raise
+
+        return written
+
+    def write(self, entries):
+        return self._users(entries).update(
+            last_login=self._last_login(entries)
+        )
+
+    async def awrite(self, entries):
+        return await self._users(entries).aupdate(
+            last_login=self._last_login(entries)
+        )
+
+    def start(self):
+        """start buffering, stopping when the process exits"""
+        if self._started or self._stopped:
+            return
+
+        self._started = True
+        self._start_thread()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """stop the thread and write what is left"""
+        atexit.unregister(self.stop)
+        self._stopped = True
+        self._event.set()
+
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("writing last_login failed")
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _users(self, entries):
+        return get_user_model().objects.filter(
+            pk__in=[user_id for user_id, _ in entries]
+        )
+
+    def _last_login(self, entries):
+        return Case(
+            *[When(pk=user_id, then=Value(when)) for user_id, when in entries],
+            output_field=DateTimeField()
+        )
+
+    def _start_thread(self):
+        """start the flushing thread unless it is alive"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            self._thread = threading.Thread(
+                target=self._run,
+                name="last-login",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _reset(self):
+        """
+        A forked child inherits neither the thread nor a usable lock, and
+        the buffer stays with the parent, which writes it.
+        """
+        self._pending = {}
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopped:
+            self._event.wait(self.flush_interval)
+            self._event.clear()
+
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("writing last_login failed")
+            finally:
+                close_old_connections()
+
+
+last_login_recorder = LastLoginRecorder.from_settings()
@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from authentication.hashing import PasswordHasherPool
+from authentication.importing import UserImport
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "create users from a csv or jsonl file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='file with first_name, last_name, email, phone and '
+            'password per row, - reads stdin'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            default=None,
+            help='defaults to the file extension'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='processes hashing the passwords'
+        )
+
+    def handle(self, *args, **options):
+        """entry point of the command"""
+        try:
+            hasher = PasswordHasherPool(workers=options['workers'])
+            importer = UserImport(hasher)
+            started = time.monotonic()
+
+            self.stdout.write('Importing users')
+
+            try:
+                with self.open(options['path']) as file:
+                    rows = self.read(file, options['format'] or (
+                        'jsonl' if options['path'].endswith('.jsonl')
+                        else 'csv'
+                    ))
+
+                    while batch := list(islice(rows, options['batch_size'])):
+                        importer.add(batch)
+                        self.stdout.write(
+                            f'Created {importer.created} users, '
+                            f'rejected {len(importer.rejected)} rows'
+                        )
+            finally:
+                hasher.shutdown()
+
+            for line, reason in importer.rejected:
+                self.stdout.write(f'Rejected line {line}: {reason}')
+
+            elapsed = time.monotonic() - started
+            total = importer.created + len(importer.rejected)
+            self.stdout.write(
+                f'{total} rows in {elapsed:.1f}s '
+                f'({total / elapsed:.0f} rows/sec)'
+            )
+            self.stdout.write(self.style.SUCCESS('Complete'))
+        except Exception as e:
+            self.stderr.write(str(e))
+
+    def open(self, path):
+        if path == '-':
+            return os.fdopen(os.dup(sys.stdin.fileno()), newline='')
+
+        return open(path, newline='')
+
+    def read(self, file, format):
+        """yield (line, row) pairs without loading the whole file"""
+        if format == 'csv':
+            reader = csv.DictReader(file)
+
+            for row in reader:
+                yield reader.line_num, row
+
+            return
+
+        for line, text in enumerate(file, start=1):
+            if text.strip():
+                yield line, json.loads(text)
@@ -0,0 +1,47 @@
+import time
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "measure pbkdf2 on this machine and suggest an iteration count"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=250,
+            help='time a single hash should take'
+        )
+        parser.add_argument('--samples', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """entry point of the command"""
+        hasher = PBKDF2PasswordHasher()
+        salt = hasher.salt()
+        probe = 100000
+        timings = []
+
+        for _ in range(options['samples']):
+            start = time.perf_counter()
+            hasher.encode('calibration password', salt, iterations=probe)
+            timings.append(time.perf_counter() - start)
+
+        """the fastest sample is the least disturbed by other load"""
+        per_iteration = min(timings) / probe
+        iterations = int(options['target_ms'] / 1000 / per_iteration)
+        iterations = max(1000, iterations // 1000 * 1000)
+
+        self.stdout.write(
+            f'{probe} iterations take {min(timings) * 1000:.1f}ms'
+        )
+
+        if iterations < PBKDF2PasswordHasher.iterations:
+            self.stdout.write(self.style.WARNING(
+                f'{iterations} is below the django default of '
+                f'{PBKDF2PasswordHasher.iterations} iterations'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'PASSWORD_HASHING["ITERATIONS"] = {iterations}'
+        ))
@@ -0,0 +1,8 @@
+from authentication.purge import PurgeCommand, expired_refresh_tokens
+
+
+class Command(PurgeCommand):
+    help = "delete the rows kept for refresh tokens that have expired"
+
+    def get_querysets(self):
+        return expired_refresh_tokens()
@@ -0,0 +1,8 @@
+from authentication.purge import PurgeCommand, outbox_entries
+
+
+class Command(PurgeCommand):
+    help = "delete outbox entries published or given up before the retention"
+
+    def get_querysets(self):
+        return outbox_entries()
@@ -0,0 +1,40 @@
+import time
+from authentication.outbox import drain
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "publish pending authentication notifications from the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='keep polling the outbox instead of exiting when empty'
+        )
+        parser.add_argument('--interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        """entry point of the command"""
+        try:
+            while True:
+                drained = 0
+
+                while True:
+                    count = drain(options['batch_size'])
+                    drained += count
+
+                    if not count:
+                        break
+
+                self.stdout.write(f'Drained {drained} entries')
+
+                if not options['loop']:
+                    break
+
+                time.sleep(options['interval'])
+
+            self.stdout.write(self.style.SUCCESS('Complete'))
+        except Exception as e:
+            self.stderr.write(str(e))
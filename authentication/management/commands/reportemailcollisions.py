@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+class Command(BaseCommand):
+    help = "report users whose emails only differ in case"
+
+    def handle(self, *args, **options):
+        """entry point of the command"""
+        try:
+            users = get_user_model().objects.annotate(
+                email_lower=Lower('email')
+            )
+            colliding = users.values('email_lower').annotate(
+                count=Count('pk')
+            ).filter(count__gt=1).values('email_lower')
+
+            rows = users.filter(
+                email_lower__in=colliding
+            ).order_by('email_lower', 'date_created').values_list(
+                'email_lower',
+                'pk',
+                'email',
+                'is_active',
+                'last_login',
+                'date_created'
+            )
+
+            current = None
+            collisions = 0
+
+            for (email_lower, pk, email, is_active, last_login,
+                    date_created) in rows.iterator():
+                if email_lower != current:
+                    current = email_lower
+                    collisions += 1
+                    self.stdout.write(email_lower)
+
+                self.stdout.write(
+                    f'  {pk} {email} active={is_active} '
+                    f'created={date_created.date()} '
+                    f'last_login={last_login and last_login.date()}'
+                )
+
+            self.stdout.write(f'Found {collisions} colliding emails')
+            self.stdout.write(self.style.SUCCESS('Complete'))
+        except Exception as e:
+            self.stderr.write(str(e))
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_tokenfamily'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tokens',
+            index=models.Index(fields=['token', 'is_valid'], name='authenticat_token_abe115_idx'),
+        ),
+    ]
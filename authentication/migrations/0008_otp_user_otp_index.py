@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_tokens_token_is_valid_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['user', 'otp'], name='authenticat_user_id_e8b559_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 18:07
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def keep_latest_otp(apps, schema_editor):
+    """drop every otp except the latest one of each user"""
+    Otp = apps.get_model('authentication', 'Otp')
+    latest = Otp.objects.values('user').annotate(latest=Max('id'))
+    Otp.objects.exclude(
+        id__in=latest.values('latest')
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0008_otp_user_otp_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_otp, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='otp',
+            constraint=models.UniqueConstraint(fields=('user',), name='unique_otp_user'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0009_otp_unique_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Outbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_published', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('date_published__isnull', True)), fields=['id'], name='outbox_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-18 18:37
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_email_collisions(apps, schema_editor):
+    """the index can not be built while emails only differ in case"""
+    User = apps.get_model('authentication', 'User')
+    collisions = User.objects.annotate(
+        email_lower=Lower('email')
+    ).values('email_lower').annotate(
+        count=Count('pk')
+    ).filter(count__gt=1).count()
+
+    if collisions:
+        raise RuntimeError(
+            f'{collisions} emails are used by several users in different '
+            'case, list them with the reportemailcollisions command and '
+            'merge or rename those users before migrating'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0011_user_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_email_collisions,
+            migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='user_email_lower_uniq'),
+        ),
+    ]
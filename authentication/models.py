@@ -1,5 +1,9 @@
+from asgiref.sync import sync_to_async
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from authentication.hashing import password_hasher
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -9,18 +13,45 @@ from django.contrib.auth.models import (
 
 class UserManager(BaseUserManager):
     def create(self, email, password, **extras):
+        user = self.build(email, password, **extras)
+        user.set_password(password)
+
+        return self.save_new(user)
+
+    async def acreate(self, email, password, **extras):
+        """create() hashing the password without blocking the event loop"""
+        user = self.build(email, password, **extras)
+        await user.aset_password(password)
+
+        return await sync_to_async(self.save_new)(user)
+
+    def by_email(self, *emails):
+        """
+        Users with any of the emails, ignoring case. Compares lower(email)
+        so the lookup uses the unique index on that expression.
+        """
+        return self.alias(email_lower=Lower('email')).filter(
+            email_lower__in=[Lower(Value(email)) for email in emails]
+        )
+
+    def get_by_natural_key(self, username):
+        return self.by_email(username).get()
+
+    def build(self, email, password, **extras):
         if not email:
             raise ValueError("Email is required")
         if not password:
             raise ValueError("Password is required")
 
-        user = self.model(
+        return self.model(
             email=self.normalize_email(email),
             **extras
         )
 
-        user.set_password(password)
-        user.save(using=self._db)
+    def save_new(self, user):
+        """the verification token and outbox rows commit with the user"""
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
 
         return user
 
@@ -54,6 +85,20 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['date_created', 'id'],
+                name='user_created_id_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                Lower('email'),
+                name='user_email_lower_uniq'
+            ),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -61,6 +106,42 @@ class User(AbstractBaseUser, PermissionsMixin):
     def full_name(self):
         return f'{self.first_name} {self.last_name}'
 
+    def set_password(self, raw_password):
+        """hash on the password hasher pool"""
+        self.password = password_hasher.make_password(raw_password)
+        self._password = raw_password
+
+    async def aset_password(self, raw_password):
+        self.password = await password_hasher.amake_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """verify on the pool, rehashing outdated hashes on success"""
+        is_correct, must_update = password_hasher.verify_password(
+            raw_password,
+            self.password
+        )
+
+        if is_correct and must_update:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return is_correct
+
+    async def acheck_password(self, raw_password):
+        is_correct, must_update = await password_hasher.averify_password(
+            raw_password,
+            self.password
+        )
+
+        if is_correct and must_update:
+            await self.aset_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=['password'])
+
+        return is_correct
+
     @property
     def is_staff(self):
         return self.is_admin
@@ -75,11 +156,55 @@ class Tokens(models.Model):
 
     is_valid = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'is_valid']),
+        ]
+
     def __str__(self) -> str:
         return self.token
 
 
+class OtpManager(models.Manager):
+    def issue(self, user, otp):
+        """replace the otp of the user with a fresh one in one upsert"""
+        instance = self.model(user=user, otp=otp, is_valid=False)
+        self.bulk_create(
+            [instance],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['otp', 'is_valid', 'date_created', 'date_modified']
+        )
+
+        return instance
+
+    def verify(self, user, otp):
+        """mark a fresh and unverified otp as verified in one statement"""
+        now = timezone.now()
+        verified = self.filter(
+            user=user,
+            otp=otp,
+            date_created__gt=now - Otp.LIFETIME,
+            is_valid=False
+        ).update(is_valid=True, date_modified=now)
+
+        return verified > 0
+
+    async def averify(self, user, otp):
+        now = timezone.now()
+        verified = await self.filter(
+            user=user,
+            otp=otp,
+            date_created__gt=now - Otp.LIFETIME,
+            is_valid=False
+        ).aupdate(is_valid=True, date_modified=now)
+
+        return verified > 0
+
+
 class Otp(models.Model):
+    LIFETIME = timezone.timedelta(minutes=5)
+
     otp = models.CharField(max_length=10)
     user = models.ForeignKey(to=User, on_delete=models.CASCADE)
 
@@ -88,10 +213,59 @@ class Otp(models.Model):
 
     is_valid = models.BooleanField(default=False)
 
+    objects = OtpManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'otp']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user'], name='unique_otp_user'),
+        ]
+
     @property
     def is_expired(self):
-        time_difference = timezone.now() - self.date_created
-        return time_difference.total_seconds() > 5 * 60
+        return timezone.now() - self.date_created > self.LIFETIME
 
     def __str__(self) -> str:
         return self.otp
+
+
+class TokenFamily(models.Model):
+    """one row per login session, rotated in place on every refresh"""
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE)
+    generation = models.PositiveIntegerField(default=0)
+
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    is_revoked = models.BooleanField(default=False)
+
+    def __str__(self) -> str:
+        return f'{self.user_id}:{self.pk}:{self.generation}'
+
+
+class Outbox(models.Model):
+    """notifications written in the same transaction as the change"""
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField()
+
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_published = models.DateTimeField(null=True, blank=True)
+
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(date_published__isnull=True),
+                name='outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.topic}:{self.pk}'
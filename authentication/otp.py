@@ -0,0 +1,253 @@
+import secrets
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.module_loading import import_string
+from authentication.models import Otp
+from authentication.signals import notify_otp_created
+
+
+def generate_secure_otp():
+    """
+    Generate a secure random 6-digit OTP.
+
+    Returns:
+    - str: The generated 6-digit OTP.
+    """
+    # Generate a random integer with 6 digits
+    otp = ''.join(str(secrets.randbelow(10)) for _ in range(6))
+
+    return otp
+
+
+class BaseOtpStore:
+    """interface shared by the otp stores"""
+
+    VERIFIED = "verified"
+    UNVERIFIED = "unverified"
+    EXPIRED = "expired"
+    INVALID = "invalid"
+
+    def issue(self, user):
+        """create a new otp for the user, send otp_created and return it"""
+        raise NotImplementedError
+
+    def verify(self, user, otp):
+        """mark the otp as verified, returns VERIFIED, EXPIRED or INVALID"""
+        raise NotImplementedError
+
+    def check(self, user, otp):
+        """returns VERIFIED, UNVERIFIED or INVALID without consuming"""
+        raise NotImplementedError
+
+    async def aissue(self, user):
+        return await sync_to_async(self.issue)(user)
+
+    async def averify(self, user, otp):
+        return await sync_to_async(self.verify)(user, otp)
+
+    async def acheck(self, user, otp):
+        return await sync_to_async(self.check)(user, otp)
+
+
+class ModelOtpStore(BaseOtpStore):
+    """keep the otp in the Otp table"""
+
+    def issue(self, user):
+        otp = generate_secure_otp()
+
+        with transaction.atomic():
+            instance = Otp.objects.issue(user, otp)
+            notify_otp_created(instance)
+
+        return otp
+
+    def verify(self, user, otp):
+        if Otp.objects.verify(user, otp):
+            return self.VERIFIED
+
+        if Otp.objects.filter(otp=otp, user=user).exists():
+            """expired or verified before"""
+            return self.EXPIRED
+
+        return self.INVALID
+
+    def check(self, user, otp):
+        is_valid = Otp.objects.filter(otp=otp, user=user).values_list(
+            'is_valid',
+            flat=True
+        ).first()
+
+        if is_valid is None:
+            return self.INVALID
+
+        return self.VERIFIED if is_valid else self.UNVERIFIED
+
+    async def averify(self, user, otp):
+        if await Otp.objects.averify(user, otp):
+            return self.VERIFIED
+
+        if await Otp.objects.filter(otp=otp, user=user).aexists():
+            return self.EXPIRED
+
+        return self.INVALID
+
+    async def acheck(self, user, otp):
+        is_valid = await Otp.objects.filter(otp=otp, user=user).values_list(
+            'is_valid',
+            flat=True
+        ).afirst()
+
+        if is_valid is None:
+            return self.INVALID
+
+        return self.VERIFIED if is_valid else self.UNVERIFIED
+
+
+class CacheOtpStore(BaseOtpStore):
+    """
+    Keep a hash of the otp in a django cache.
+
+    The cache timeout expires the otp so nothing has to be cleaned up and
+    issuing or verifying an otp never writes to the database. Verifying
+    adds a marker key for the issued otp, cache.add only succeeds once so
+    concurrent verifies of the same otp consume it once, like the
+    conditional UPDATE of ModelOtpStore.
+    """
+
+    key_prefix = "otp"
+    key_salt = "authentication.otp.CacheOtpStore"
+
+    def __init__(self, cache="default"):
+        self.cache = caches[cache]
+
+    def make_key(self, user):
+        return f"{self.key_prefix}:{user.pk}"
+
+    def make_verified_key(self, user, entry):
+        """expires_at identifies the issued otp, a new one is unverified"""
+        return f"{self.make_key(user)}:verified:{entry['expires_at']!r}"
+
+    def make_hash(self, user, otp):
+        return salted_hmac(self.key_salt, f"{user.pk}:{otp}").hexdigest()
+
+    def make_entry(self, user, otp):
+        return {
+            "hash": self.make_hash(user, otp),
+            "expires_at": time.time() + Otp.LIFETIME.total_seconds(),
+        }
+
+    def issue(self, user):
+        otp = generate_secure_otp()
+        self.cache.set(
+            self.make_key(user),
+            self.make_entry(user, otp),
+            timeout=Otp.LIFETIME.total_seconds()
+        )
+
+        """receivers still get an otp instance, it is just never saved"""
+        notify_otp_created(Otp(otp=otp, user=user))
+
+        return otp
+
+    async def aissue(self, user):
+        otp = generate_secure_otp()
+        await self.cache.aset(
+            self.make_key(user),
+            self.make_entry(user, otp),
+            timeout=Otp.LIFETIME.total_seconds()
+        )
+
+        await sync_to_async(notify_otp_created)(Otp(otp=otp, user=user))
+
+        return otp
+
+    def verify(self, user, otp):
+        entry = self._get(user, otp)
+        status, timeout = self._remaining(entry)
+
+        if status is None:
+            status = self._consumed(self.cache.add(
+                self.make_verified_key(user, entry),
+                True,
+                timeout=timeout
+            ))
+
+        return status
+
+    async def averify(self, user, otp):
+        entry = self._check(user, otp, await self.cache.aget(
+            self.make_key(user)
+        ))
+        status, timeout = self._remaining(entry)
+
+        if status is None:
+            status = self._consumed(await self.cache.aadd(
+                self.make_verified_key(user, entry),
+                True,
+                timeout=timeout
+            ))
+
+        return status
+
+    def check(self, user, otp):
+        entry = self._get(user, otp)
+
+        if entry is None:
+            return self.INVALID
+
+        return self._status(
+            self.cache.get(self.make_verified_key(user, entry))
+        )
+
+    async def acheck(self, user, otp):
+        entry = self._check(user, otp, await self.cache.aget(
+            self.make_key(user)
+        ))
+
+        if entry is None:
+            return self.INVALID
+
+        return self._status(
+            await self.cache.aget(self.make_verified_key(user, entry))
+        )
+
+    def _remaining(self, entry):
+        """None and the seconds left when the otp can still be verified"""
+        if entry is None:
+            return self.INVALID, None
+
+        timeout = entry["expires_at"] - time.time()
+
+        if timeout <= 0:
+            return self.EXPIRED, None
+
+        return None, timeout
+
+    def _consumed(self, added):
+        """a marker already present means it was verified before"""
+        return self.VERIFIED if added else self.EXPIRED
+
+    def _status(self, verified):
+        return self.VERIFIED if verified else self.UNVERIFIED
+
+    def _get(self, user, otp):
+        return self._check(user, otp, self.cache.get(self.make_key(user)))
+
+    def _check(self, user, otp, entry):
+        if entry is None or not constant_time_compare(
+            entry["hash"],
+            self.make_hash(user, otp)
+        ):
+            return None
+
+        return entry
+
+
+def get_otp_store():
+    """instantiate the store configured in the OTP_STORE setting"""
+    options = settings.OTP_STORE
+    return import_string(options["BACKEND"])(**options["OPTIONS"])
@@ -0,0 +1,134 @@
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from authentication.models import Outbox
+
+
+logger = logging.getLogger(__name__)
+
+_publishers = {}
+
+
+def register(topic, publisher):
+    """publisher(payload) is called for every drained entry of the topic"""
+    _publishers[topic] = publisher
+
+
+def write(topic, payload):
+    """
+    Store a notification in the current transaction.
+
+    It is published once the transaction commits, so a rollback never
+    leaks a notification and the request only pays for one insert.
+    """
+    Outbox.objects.create(topic=topic, payload=payload)
+
+    if settings.OUTBOX["DRAIN_IN_PROCESS"]:
+        transaction.on_commit(outbox_drainer.wake)
+
+
+def write_many(topic, payloads):
+    """write() for many notifications in one insert"""
+    Outbox.objects.bulk_create(
+        [Outbox(topic=topic, payload=payload) for payload in payloads]
+    )
+
+    if settings.OUTBOX["DRAIN_IN_PROCESS"]:
+        transaction.on_commit(outbox_drainer.wake)
+
+
+def drain(batch_size=None):
+    """
+    Publish one batch of due entries, returns how many were handled.
+
+    Each entry is published in its own savepoint. An entry whose publisher
+    fails, or whose topic has none, records the error and is retried after
+    a backoff doubling with every attempt, so it never blocks the entries
+    behind it. Entries are given up after MAX_ATTEMPTS.
+    """
+    options = settings.OUTBOX
+    batch_size = batch_size or options["BATCH_SIZE"]
+    now = timezone.now()
+
+    with transaction.atomic():
+        entries = list(
+            Outbox.objects.filter(
+                Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+                date_published__isnull=True,
+                attempts__lt=options["MAX_ATTEMPTS"]
+            ).select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        published = []
+        failed = []
+
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    _publishers[entry.topic](entry.payload)
+            except Exception as e:
+                logger.exception("publishing outbox entry %s failed", entry)
+                entry.last_error = repr(e)
+                entry.next_attempt_at = now + timezone.timedelta(
+                    seconds=options["RETRY_BACKOFF"] * 2 ** entry.attempts
+                )
+                entry.attempts += 1
+                failed.append(entry)
+            else:
+                published.append(entry.pk)
+
+        Outbox.objects.filter(pk__in=published).update(date_published=now)
+        Outbox.objects.bulk_update(
+            failed,
+            ['attempts', 'last_error', 'next_attempt_at']
+        )
+
+    return len(entries)
+
+
+class OutboxDrainer:
+    """background thread draining the outbox after commits and on a timer"""
+
+    def __init__(self, poll_interval=5):
+        self.poll_interval = poll_interval
+
+        self._event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def wake(self):
+        self.start()
+        self._event.set()
+
+    def start(self):
+        if self._thread:
+            return
+
+        with self._lock:
+            if self._thread:
+                return
+
+            self._thread = threading.Thread(
+                target=self._run,
+                name="outbox-drainer",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._event.wait(self.poll_interval)
+            self._event.clear()
+
+            try:
+                while drain():
+                    pass
+            except Exception:
+                logger.exception("draining the outbox failed")
+            finally:
+                close_old_connections()
+
+
+outbox_drainer = OutboxDrainer(settings.OUTBOX["POLL_INTERVAL"])
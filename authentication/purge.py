@@ -0,0 +1,170 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import router
+from django.db.models import Q
+from django.db.models.deletion import Collector
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from authentication.models import Otp, Outbox, TokenFamily, Tokens
+
+
+def expired_otps():
+    expired_before = timezone.now() - Otp.LIFETIME
+    return [
+        ('otp', Otp.objects.filter(date_created__lte=expired_before)),
+    ]
+
+
+def used_tokens():
+    return [
+        ('token', Tokens.objects.filter(is_valid=False)),
+    ]
+
+
+def expired_refresh_tokens():
+    """blacklist rows first, they would cascade from the outstanding ones"""
+    now = timezone.now()
+    return [
+        ('blacklisted token', BlacklistedToken.objects.filter(
+            token__expires_at__lte=now
+        )),
+        ('outstanding token', OutstandingToken.objects.filter(
+            expires_at__lte=now
+        )),
+        ('token family', TokenFamily.objects.filter(expires_at__lte=now)),
+    ]
+
+
+def outbox_entries():
+    """entries published, or given up, longer than the retention ago"""
+    options = settings.OUTBOX
+    expired_before = timezone.now() - timezone.timedelta(
+        seconds=options["RETENTION"]
+    )
+    return [
+        ('outbox', Outbox.objects.filter(
+            Q(date_published__lte=expired_before)
+            | Q(
+                date_published__isnull=True,
+                attempts__gte=options["MAX_ATTEMPTS"],
+                date_created__lte=expired_before
+            )
+        )),
+    ]
+
+
+class Purge:
+    """
+    Delete the rows of a queryset in primary key ordered batches.
+
+    Every batch is its own statement or short transaction, so locks are
+    only held for one batch. Rows are deleted with a single DELETE when no
+    delete signals or cascades apply to the model, otherwise each batch
+    goes through the regular collector.
+    """
+
+    def __init__(self, queryset, batch_size=1000):
+        self.queryset = queryset
+        self.batch_size = batch_size
+        self.using = router.db_for_write(queryset.model)
+
+    def count(self):
+        return self.queryset.count()
+
+    def is_fast(self):
+        return Collector(using=self.using).can_fast_delete(self.queryset)
+
+    def batches(self, deadline=None):
+        """delete batch after batch, yields the rows deleted by each"""
+        is_fast = self.is_fast()
+        last_pk = None
+
+        while deadline is None or time.monotonic() < deadline:
+            queryset = self.queryset.order_by('pk')
+
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+
+            pks = list(
+                queryset.values_list('pk', flat=True)[:self.batch_size]
+            )
+
+            if not pks:
+                return
+
+            last_pk = pks[-1]
+
+            """the filter is applied again, a row may have changed since"""
+            batch = self.queryset.filter(pk__in=pks)
+
+            if is_fast:
+                yield batch._raw_delete(self.using)
+            else:
+                _, deleted = batch.delete()
+                yield deleted.get(self.queryset.model._meta.label, 0)
+
+    def run(self, deadline=None):
+        """delete all batches, returns the number of rows deleted"""
+        return sum(self.batches(deadline))
+
+
+class PurgeCommand(BaseCommand):
+    """
+    Base of the commands deleting expired rows.
+
+    Subclasses return (name, queryset) pairs from get_querysets(), they
+    are purged in that order within one --max-seconds budget.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--max-seconds',
+            type=float,
+            default=None,
+            help='stop after the batch running when the budget is used up'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='only count the rows that would be deleted'
+        )
+
+    def get_querysets(self):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        """entry point of the command"""
+        try:
+            deadline = None
+
+            if options['max_seconds'] is not None:
+                deadline = time.monotonic() + options['max_seconds']
+
+            for name, queryset in self.get_querysets():
+                purge = Purge(queryset, options['batch_size'])
+
+                if options['dry_run']:
+                    self.stdout.write(
+                        f'Would delete {purge.count()} {name} entries'
+                    )
+                    continue
+
+                self.stdout.write(f'Deleting {name} entries')
+                deleted = 0
+
+                for count in purge.batches(deadline):
+                    deleted += count
+                    self.stdout.write(f'Deleted {deleted} {name} entries')
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.stdout.write('Time budget used up, stopping')
+                    return
+
+            self.stdout.write(self.style.SUCCESS('Complete'))
+        except Exception as e:
+            self.stderr.write(str(e))
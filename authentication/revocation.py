@@ -0,0 +1,135 @@
+import heapq
+import threading
+import time
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+
+
+class RevocationIndex:
+    """
+    Per process index of blacklisted refresh token jtis.
+
+    The first lookup loads every blacklisted token that has not expired yet,
+    later lookups poll at most once per sync interval. Tokens blacklisted by
+    this process are added right away, tokens blacklisted by other workers
+    become visible after the next poll. Entries are dropped once their token
+    has expired since the exp check rejects those tokens anyway.
+
+    A row can commit after rows with a higher id were already polled, so a
+    poll does not start after the highest id seen. It starts after the
+    highest id blacklisted more than overlap seconds before the previous
+    poll, rows blacklisted since are read again. A revocation is missed
+    only when its transaction commits more than overlap seconds after the
+    insert.
+    """
+
+    def __init__(self, sync_interval=1, overlap=10):
+        self.sync_interval = sync_interval
+        self.overlap = timezone.timedelta(seconds=overlap)
+
+        self._entries = {}
+        self._expiries = []
+        self._last_id = None
+        self._synced_at = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = settings.SIMPLE_JWT
+        return cls(
+            sync_interval=options["REVOCATION_INDEX_SYNC_INTERVAL"],
+            overlap=options["REVOCATION_INDEX_SYNC_OVERLAP"]
+        )
+
+    @property
+    def is_warm(self):
+        return self._last_id is not None
+
+    def add(self, jti, exp):
+        with self._lock:
+            self._add(jti, exp)
+
+    def is_revoked(self, jti):
+        if self.is_stale():
+            self.poll()
+
+        with self._lock:
+            return jti in self._entries
+
+    async def ais_revoked(self, jti):
+        if self.is_stale():
+            await self.apoll()
+
+        with self._lock:
+            return jti in self._entries
+
+    def is_stale(self):
+        with self._lock:
+            return time.monotonic() - self._synced_at >= self.sync_interval
+
+    def poll(self):
+        """pull newly blacklisted tokens and forget expired ones"""
+        now = timezone.now()
+        self._merge(list(self._pending(now)), now)
+
+    async def apoll(self):
+        now = timezone.now()
+        self._merge([row async for row in self._pending(now)], now)
+
+    def _pending(self, now):
+        rows = BlacklistedToken.objects.filter(
+            token__expires_at__gt=now
+        ).order_by('id')
+
+        if self.is_warm:
+            rows = rows.filter(id__gt=self._last_id)
+
+        return rows.values_list(
+            'id',
+            'blacklisted_at',
+            'token__jti',
+            'token__expires_at'
+        )
+
+    def _merge(self, rows, now):
+        settled_at = now - self.overlap
+
+        with self._lock:
+            last_id = self._last_id or 0
+
+            for pk, blacklisted_at, jti, expires_at in rows:
+                self._add(jti, datetime_to_epoch(expires_at))
+
+                if blacklisted_at < settled_at:
+                    last_id = max(last_id, pk)
+
+            self._last_id = last_id
+
+            self._prune(datetime_to_epoch(now))
+            self._synced_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._expiries.clear()
+            self._last_id = None
+            self._synced_at = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _add(self, jti, exp):
+        if jti not in self._entries:
+            heapq.heappush(self._expiries, (exp, jti))
+
+        self._entries[jti] = exp
+
+    def _prune(self, now):
+        while self._expiries and self._expiries[0][0] <= now:
+            _, jti = heapq.heappop(self._expiries)
+            self._entries.pop(jti, None)
+
+
+revocation_index = RevocationIndex.from_settings()
@@ -1,41 +1,204 @@
+import re
 from django.contrib.auth.tokens import default_token_generator
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth import get_user_model
 from authentication.models import Tokens, Otp
-import secrets
-from django.contrib.auth import authenticate
-
-
-def generate_secure_otp():
+from authentication.cache import user_cache
+from authentication.activation import activate_user, aactivate_user
+from authentication.last_login import last_login_recorder
+from authentication.otp import BaseOtpStore, get_otp_store
+from django.contrib.auth import aauthenticate, authenticate
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, UniqueConstraint
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer
+)
+from authentication.helper import (
+    add_user_claims,
+    arefresh_token,
+    get_refresh_token_class,
+    refresh_token
+)
+from core.serializer import AsyncSerializerMixin
+
+
+class UserModelSerializer(AsyncSerializerMixin, serializers.ModelSerializer):
     """
-    Generate a secure random 6-digit OTP.
-
-    Returns:
-    - str: The generated 6-digit OTP.
+    The unique validators on email and phone query the database, unless
+    REGISTRATION_FAST_PATH leaves the check to the unique constraints.
+    Either way an insert violating one is reported as a field error.
     """
-    # Generate a random integer with 6 digits
-    otp = ''.join(str(secrets.randbelow(10)) for _ in range(6))
-
-    return otp
-
+    unique_fields = ('email', 'phone')
 
-class UserModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ['first_name', 'last_name', 'email', 'phone', 'password']
         extra_kwargs = {'password': {'write_only': True}}
 
+    @property
+    def unique_validators(self):
+        return not settings.REGISTRATION_FAST_PATH
+
+    @property
+    def field_validation_in_thread(self):
+        return self.unique_validators
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        if not self.unique_validators:
+            for name in self.unique_fields:
+                fields[name].validators = [
+                    validator for validator in fields[name].validators
+                    if not isinstance(validator, UniqueValidator)
+                ]
+
+        return fields
+
     def create(self, validated_data):
-        return get_user_model().objects.create(**validated_data)
+        try:
+            return get_user_model().objects.create(**validated_data)
+        except IntegrityError as exc:
+            self.fail_unique(exc)
+
+    async def acreate(self, validated_data):
+        try:
+            return await get_user_model().objects.acreate(**validated_data)
+        except IntegrityError as exc:
+            self.fail_unique(exc)
+
+    def fail_unique(self, exc):
+        """raise the error of the unique validator the insert tripped"""
+        model = get_user_model()
+        name = self.unique_constraints().get(self.constraint_name(exc))
+
+        if name is None:
+            raise exc
+
+        field = model._meta.get_field(name)
+        message = field.error_messages['unique'] % {
+            'model_name': model._meta.verbose_name,
+            'field_label': field.verbose_name,
+        }
+        raise serializers.ValidationError({name: [message]}, code='unique')
+
+    @staticmethod
+    def constraint_name(exc):
+        """
+        The name of the violated constraint. Postgres reports it apart from
+        the message, sqlite and mysql end their message with it. The values
+        in the message are never matched against field names.
+        """
+        diag = getattr(exc.__cause__, 'diag', None)
+
+        if diag is not None:
+            return diag.constraint_name
+
+        match = re.search(
+            r"UNIQUE constraint failed: (?:index '([^']+)'|(\S+))$"
+            r"|for key '([^']+)'$",
+            str(exc.__cause__)
+        )
+
+        if match is None:
+            return None
+
+        return next(group for group in match.groups() if group)
+
+    def unique_constraints(self):
+        """
+        Constraint names, as the backends report them, of the unique fields.
+        A unique column is reported as table.column by sqlite and mysql, and
+        named table_column_key by postgres.
+        """
+        model = get_user_model()
+        table = model._meta.db_table
+        names = {}
+
+        for name in self.unique_fields:
+            column = model._meta.get_field(name).column
+            names[f'{table}.{column}'] = name
+            names[f'{table}_{column}_key'] = name
+            names[column] = name
+
+        for constraint in model._meta.constraints:
+            if not isinstance(constraint, UniqueConstraint):
+                continue
 
+            fields = [*constraint.fields, *(
+                node.name
+                for expression in constraint.expressions
+                for node in expression.flatten()
+                if isinstance(node, F)
+            )]
 
-class TokenSerializer(serializers.ModelSerializer):
+            for name in fields:
+                if name in self.unique_fields:
+                    names[constraint.name] = name
+
+        return names
+
+
+class TokenSerializer(AsyncSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tokens
         fields = ['token']
 
     def validate(self, attrs):
         """validate the token and activate the account"""
+        token = self.check_attrs(attrs)
+
+        if settings.SIGNED_ACTIVATION_TOKENS:
+            if not activate_user(token):
+                self.fail_token()
+
+            return attrs
+
+        token_instance = Tokens.objects.select_related('user').filter(
+            token=token,
+            is_valid=True
+        ).first()
+
+        self.check_token(token_instance, token)
+
+        if not self.activate(token_instance):
+            self.fail_token()
+
+        user_cache.invalidate(token_instance.user_id)
+
+        return attrs
+
+    async def avalidate(self, attrs):
+        token = self.check_attrs(attrs)
+
+        if settings.SIGNED_ACTIVATION_TOKENS:
+            if not await aactivate_user(token):
+                self.fail_token()
+
+            return attrs
+
+        token_instance = await Tokens.objects.select_related('user').filter(
+            token=token,
+            is_valid=True
+        ).afirst()
+
+        self.check_token(token_instance, token)
+
+        if not await sync_to_async(self.activate)(token_instance):
+            self.fail_token()
+
+        await user_cache.ainvalidate(token_instance.user_id)
+
+        return attrs
+
+    def check_attrs(self, attrs):
         token = attrs.get('token', None)
 
         if not token:
@@ -44,29 +207,43 @@ class TokenSerializer(serializers.ModelSerializer):
                 code=400
             )
 
-        if not Tokens.objects.filter(token=token, is_valid=True).exists():
-            raise serializers.ValidationError(
-                {"token": "Invalid token provided"},
-                code=400
-            )
+        return token
 
-        token_instance = Tokens.objects.get(token=token, is_valid=True)
+    def check_token(self, token_instance, token):
+        if not token_instance or not default_token_generator.check_token(
+            token_instance.user,
+            token
+        ):
+            self.fail_token()
 
-        if not default_token_generator.check_token(token_instance.user, token):
-            raise serializers.ValidationError(
-                {"token": "Invalid token provided"},
-                code=400
-            )
+    def activate(self, token_instance):
+        """consume the token and activate the user, False if already used"""
+        now = timezone.now()
 
-        token_instance.user.is_active = True
-        token_instance.is_valid = False
-        token_instance.user.save()
-        token_instance.save()
+        with transaction.atomic():
+            """only the request that flips is_valid activates the account"""
+            consumed = Tokens.objects.filter(
+                pk=token_instance.pk,
+                is_valid=True
+            ).update(is_valid=False, date_modified=now)
 
-        return attrs
+            if not consumed:
+                return False
+
+            get_user_model().objects.filter(
+                pk=token_instance.user_id
+            ).update(is_active=True, date_modified=now)
+
+        return True
 
+    def fail_token(self):
+        raise serializers.ValidationError(
+            {"token": "Invalid token provided"},
+            code=400
+        )
 
-class OtpSerializer(serializers.ModelSerializer):
+
+class OtpSerializer(AsyncSerializerMixin, serializers.ModelSerializer):
     email = serializers.EmailField()
 
     class Meta:
@@ -74,6 +251,22 @@ class OtpSerializer(serializers.ModelSerializer):
         fields = ['otp', 'email']
 
     def validate(self, attrs):
+        email, otp = self.check_attrs(attrs)
+        user = get_user_model().objects.by_email(email).first()
+        self.check_user(user)
+        self.check_status(get_otp_store().verify(user, otp))
+
+        return attrs
+
+    async def avalidate(self, attrs):
+        email, otp = self.check_attrs(attrs)
+        user = await get_user_model().objects.by_email(email).afirst()
+        self.check_user(user)
+        self.check_status(await get_otp_store().averify(user, otp))
+
+        return attrs
+
+    def check_attrs(self, attrs):
         email = attrs.get('email', None)
         otp = attrs.get('otp', None)
 
@@ -91,48 +284,52 @@ class OtpSerializer(serializers.ModelSerializer):
                 code=400
             )
 
-        if not get_user_model().objects.filter(email=email).exists():
+        return email, otp
+
+    def check_user(self, user):
+        if not user:
             """user with this email does not exists"""
             raise serializers.ValidationError(
                 {"email": "Invalid email provided"},
                 code=400
             )
 
-        user = get_user_model().objects.get(email=email)
-
-        if not Otp.objects.filter(otp=otp, user=user).exists():
-            """otp does not exists in database"""
+    def check_status(self, status):
+        if status == BaseOtpStore.INVALID:
+            """otp does not exists"""
             raise serializers.ValidationError(
                 {"otp": "Invalid otp provided"},
                 code=400
             )
 
-        otp_instance = Otp.objects.get(otp=otp, user=user)
-
-        if otp_instance.is_expired:
-            """otp expired due to 5 min time line"""
+        if status == BaseOtpStore.EXPIRED:
+            """otp expired due to 5 min time line or was verified before"""
             raise serializers.ValidationError(
                 {"otp": "Otp expired"},
                 code=400
             )
 
-        if otp_instance.is_valid:
-            """otp was verified before"""
-            raise serializers.ValidationError(
-                {"otp": "Otp expired"},
-                code=400
-            )
 
-        otp_instance.is_valid = True
-        otp_instance.save()
+class OtpSerializerEmailOnly(AsyncSerializerMixin, serializers.Serializer):
+    email = serializers.EmailField()
+
+    def validate(self, attrs):
+        email = self.check_attrs(attrs)
+        user = get_user_model().objects.by_email(email).first()
+        self.check_user(user)
+        get_otp_store().issue(user)
 
         return attrs
 
+    async def avalidate(self, attrs):
+        email = self.check_attrs(attrs)
+        user = await get_user_model().objects.by_email(email).afirst()
+        self.check_user(user)
+        await get_otp_store().aissue(user)
 
-class OtpSerializerEmailOnly(serializers.Serializer):
-    email = serializers.EmailField()
+        return attrs
 
-    def validate(self, attrs):
+    def check_attrs(self, attrs):
         email = attrs.get('email', None)
 
         if not email:
@@ -141,21 +338,17 @@ class OtpSerializerEmailOnly(serializers.Serializer):
                 code=400
             )
 
-        if not get_user_model().objects.filter(email=email).exists():
+        return email
+
+    def check_user(self, user):
+        if not user:
             raise serializers.ValidationError(
                 {"email": "Email is not registered"},
                 code=400
             )
 
-        otp = generate_secure_otp()
-        user = get_user_model().objects.get(email=email)
-
-        Otp.objects.create(otp=otp, user=user)
-
-        return attrs
 
-
-class OtpSerializerPassword(serializers.ModelSerializer):
+class OtpSerializerPassword(AsyncSerializerMixin, serializers.ModelSerializer):
     email = serializers.EmailField()
     password = serializers.CharField()
 
@@ -164,6 +357,28 @@ class OtpSerializerPassword(serializers.ModelSerializer):
         fields = ['otp', 'email', 'password']
 
     def validate(self, attrs):
+        email, otp, password = self.check_attrs(attrs)
+        user = get_user_model().objects.by_email(email).first()
+        self.check_user(user)
+        self.check_status(get_otp_store().check(user, otp))
+
+        user.set_password(password)
+        user.save()
+
+        return attrs
+
+    async def avalidate(self, attrs):
+        email, otp, password = self.check_attrs(attrs)
+        user = await get_user_model().objects.by_email(email).afirst()
+        self.check_user(user)
+        self.check_status(await get_otp_store().acheck(user, otp))
+
+        await user.aset_password(password)
+        await user.asave()
+
+        return attrs
+
+    def check_attrs(self, attrs):
         email = attrs.get('email', None)
         otp = attrs.get('otp', None)
         password = attrs.get('password', None)
@@ -174,35 +389,30 @@ class OtpSerializerPassword(serializers.ModelSerializer):
                 code=400
             )
 
-        if not get_user_model().objects.filter(email=email).exists():
+        return email, otp, password
+
+    def check_user(self, user):
+        if not user:
             raise serializers.ValidationError(
                 {"email": "Email is not registered"},
                 code=400
             )
 
-        user = get_user_model().objects.get(email=email)
-
-        if not Otp.objects.filter(otp=otp, user=user).exists():
-            """otp does not exists in database"""
+    def check_status(self, status):
+        if status == BaseOtpStore.INVALID:
+            """otp does not exists"""
             raise serializers.ValidationError(
                 {"otp": "Invalid otp provided"},
                 code=400
             )
 
-        otp_instance = Otp.objects.get(otp=otp, user=user)
-
-        if not otp_instance.is_valid:
+        if status == BaseOtpStore.UNVERIFIED:
             """otp was not verified before"""
             raise serializers.ValidationError(
                 {"otp": "Unverifed Otp provided"},
                 code=400
             )
 
-        user.set_password(password)
-        user.save()
-
-        return attrs
-
 
 class AdminLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -233,3 +443,209 @@ class AdminLoginSerializer(serializers.Serializer):
             )
 
         return user
+
+
+class AdminUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = [
+            'id',
+            'email',
+            'first_name',
+            'last_name',
+            'phone',
+            'is_active',
+            'is_admin',
+            'is_superuser',
+            'last_login',
+            'date_created',
+        ]
+
+
+class SessionSerializer(serializers.Serializer):
+    """a live refresh session of the user"""
+    id = serializers.IntegerField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+
+class SessionsRevokedSerializer(serializers.Serializer):
+    revoked = serializers.IntegerField(read_only=True)
+
+
+class AdminUserFiltersSerializer(serializers.Serializer):
+    is_active = serializers.BooleanField(required=False)
+    is_admin = serializers.BooleanField(required=False)
+
+
+class AdminBulkUserSerializer(serializers.Serializer):
+    """select users by ids or filters and the changes to apply to them"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=10000
+    )
+    filters = AdminUserFiltersSerializer(required=False)
+
+    is_active = serializers.BooleanField(required=False)
+    is_admin = serializers.BooleanField(required=False)
+    logout = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filters' in attrs):
+            raise serializers.ValidationError(
+                "Provide either ids or filters"
+            )
+
+        if 'filters' in attrs and not attrs['filters']:
+            raise serializers.ValidationError(
+                {"filters": "At least one filter is required"}
+            )
+
+        if not (self.get_values(attrs) or attrs['logout']):
+            raise serializers.ValidationError("Nothing to update")
+
+        return attrs
+
+    @staticmethod
+    def get_values(attrs):
+        return {
+            field: attrs[field]
+            for field in ('is_active', 'is_admin')
+            if field in attrs
+        }
+
+    def get_queryset(self):
+        queryset = get_user_model().objects.all()
+
+        if 'ids' in self.validated_data:
+            return queryset.filter(pk__in=self.validated_data['ids'])
+
+        return queryset.filter(**self.validated_data['filters'])
+
+
+class UserTokenObtainPairSerializer(
+    AsyncSerializerMixin,
+    TokenObtainPairSerializer
+):
+    """issue the login token pair"""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(
+            get_refresh_token_class().for_user(user),
+            user
+        )
+
+    @classmethod
+    async def aget_token(cls, user):
+        return add_user_claims(
+            await get_refresh_token_class().afor_user(user),
+            user
+        )
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        if settings.LAST_LOGIN["BUFFERED"]:
+            last_login_recorder.record(self.user.pk)
+
+        return data
+
+    async def avalidate(self, attrs):
+        """
+        validate() awaiting django's authenticate, so the configured
+        backends, user_can_authenticate and user_login_failed apply alike
+        """
+        user_model = get_user_model()
+        self.user = await aauthenticate(
+            self.context.get("request"),
+            **{
+                self.username_field: attrs[self.username_field],
+                "password": attrs["password"],
+            }
+        )
+
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
+
+        refresh = await self.aget_token(self.user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+        if settings.LAST_LOGIN["BUFFERED"]:
+            await last_login_recorder.arecord(self.user.pk)
+        elif api_settings.UPDATE_LAST_LOGIN:
+            await user_model.objects.filter(pk=self.user.pk).aupdate(
+                last_login=timezone.now()
+            )
+
+        return data
+
+
+class UserTokenRefreshSerializer(AsyncSerializerMixin, TokenRefreshSerializer):
+    """rotate the token pair, restamping embedded user claims"""
+
+    def validate(self, attrs):
+        refresh = refresh_token(attrs["refresh"])
+
+        if settings.SIMPLE_JWT["EMBED_USER_CLAIMS"]:
+            """claims must not outlive a deactivation or role change"""
+            user = self.get_active_users(refresh).first()
+            self.check_user(user)
+            add_user_claims(refresh, user)
+
+        if self.check_family():
+            refresh.check_family()
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.rotate()
+            data["refresh"] = str(refresh)
+
+        return data
+
+    async def avalidate(self, attrs):
+        refresh = await arefresh_token(attrs["refresh"])
+
+        if settings.SIMPLE_JWT["EMBED_USER_CLAIMS"]:
+            user = await self.get_active_users(refresh).afirst()
+            self.check_user(user)
+            add_user_claims(refresh, user)
+
+        if self.check_family():
+            await refresh.acheck_family()
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            await refresh.arotate()
+            data["refresh"] = str(refresh)
+
+        return data
+
+    def get_active_users(self, refresh):
+        return get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[
+                api_settings.USER_ID_CLAIM
+            ]},
+            is_active=True
+        )
+
+    def check_user(self, user):
+        if not user:
+            raise AuthenticationFailed(
+                "No active account found with the given credentials",
+                code="no_active_account"
+            )
+
+    def check_family(self):
+        """rotation checks the family itself"""
+        return (
+            settings.SIMPLE_JWT["REFRESH_TOKEN_FAMILIES"]
+            and not api_settings.ROTATE_REFRESH_TOKENS
+        )
@@ -0,0 +1,103 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import DateTimeField, F, Value
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from authentication.models import TokenFamily
+from authentication.revocation import revocation_index
+
+
+def live_sessions(**filters):
+    """
+    The unexpired and unrevoked refresh sessions matching the filters.
+
+    A session is a TokenFamily row when REFRESH_TOKEN_FAMILIES is on,
+    otherwise an OutstandingToken that has not been blacklisted.
+    """
+    now = timezone.now()
+
+    if settings.SIMPLE_JWT["REFRESH_TOKEN_FAMILIES"]:
+        return TokenFamily.objects.filter(
+            **filters,
+            is_revoked=False,
+            expires_at__gt=now
+        )
+
+    return OutstandingToken.objects.filter(
+        **filters,
+        expires_at__gt=now,
+        blacklistedtoken__isnull=True
+    )
+
+
+def session_values(sessions):
+    if sessions.model is TokenFamily:
+        sessions = sessions.annotate(created_at=F('date_created'))
+
+    return sessions.order_by('-created_at').values(
+        'id',
+        'created_at',
+        'expires_at'
+    )
+
+
+async def asession_values(sessions):
+    return [session async for session in session_values(sessions)]
+
+
+def revoke_sessions(sessions):
+    """revoke every session of the queryset, returns how many were"""
+    if sessions.model is TokenFamily:
+        return sessions.update(is_revoked=True, date_modified=timezone.now())
+
+    return blacklist_tokens(sessions)
+
+
+async def arevoke_sessions(sessions):
+    if sessions.model is TokenFamily:
+        return await sessions.aupdate(
+            is_revoked=True,
+            date_modified=timezone.now()
+        )
+
+    return await sync_to_async(blacklist_tokens)(sessions)
+
+
+def blacklist_tokens(tokens):
+    """
+    Blacklist the outstanding tokens of the queryset with one
+    INSERT ... SELECT, tokens already blacklisted are skipped.
+    """
+    using = router.db_for_write(BlacklistedToken)
+    connection = connections[using]
+    meta = BlacklistedToken._meta
+
+    select, params = tokens.filter(
+        blacklistedtoken__isnull=True
+    ).annotate(
+        blacklisted_at=Value(timezone.now(), output_field=DateTimeField())
+    ).order_by().values_list(
+        'pk',
+        'blacklisted_at'
+    ).query.get_compiler(using).as_sql()
+
+    sql = 'INSERT INTO {} ({}, {}) {}'.format(
+        connection.ops.quote_name(meta.db_table),
+        connection.ops.quote_name(meta.get_field('token').column),
+        connection.ops.quote_name(meta.get_field('blacklisted_at').column),
+        select
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        blacklisted = cursor.rowcount
+
+    if blacklisted and settings.SIMPLE_JWT["REVOCATION_INDEX"]:
+        """make the revocation visible to this process right away"""
+        transaction.on_commit(revocation_index.poll, using=using)
+
+    return blacklisted
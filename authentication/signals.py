@@ -1,13 +1,73 @@
+from functools import partial
 from authentication.models import Tokens, Otp
+from authentication.cache import user_cache
+from authentication.activation import make_activation_token
+from authentication import outbox
+from django.conf import settings
+from django.db import transaction
 from django.contrib.auth.tokens import default_token_generator
 from django.db.models.signals import Signal
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 
 user_created = Signal()
 otp_created = Signal()
+# sent once per set based update with user_ids, values and logged_out
+users_bulk_updated = Signal()
+
+
+def notify_user_created(token):
+    """send user_created now or through the outbox"""
+    if settings.OUTBOX["ENABLED"]:
+        outbox.write("user_created", {"token": token})
+    else:
+        user_created.send(sender=get_user_model(), token=token)
+
+
+def notify_users_created(tokens):
+    """notify_user_created() for users created with bulk_create"""
+    if settings.OUTBOX["ENABLED"]:
+        outbox.write_many(
+            "user_created",
+            [{"token": token} for token in tokens]
+        )
+        return
+
+    def send():
+        for token in tokens:
+            user_created.send(sender=get_user_model(), token=token)
+
+    transaction.on_commit(send)
+
+
+def notify_otp_created(instance):
+    """send otp_created now or through the outbox"""
+    if settings.OUTBOX["ENABLED"]:
+        outbox.write(
+            "otp_created",
+            {"id": instance.pk, "otp": instance.otp, "user": instance.user_id}
+        )
+    else:
+        otp_created.send(sender=Otp, instance=instance)
+
+
+def publish_user_created(payload):
+    user_created.send(sender=get_user_model(), token=payload["token"])
+
+
+def publish_otp_created(payload):
+    instance = Otp(
+        pk=payload["id"],
+        otp=payload["otp"],
+        user_id=payload["user"]
+    )
+    otp_created.send(sender=Otp, instance=instance)
+
+
+outbox.register("user_created", publish_user_created)
+outbox.register("otp_created", publish_otp_created)
 
 
 @receiver(post_save, sender=get_user_model())
@@ -15,9 +75,13 @@ def after_user_created(sender, instance, created, **kwargs):
     """will be called when new user is created"""
     if created:
         """we are creating a new token for verification"""
-        token = default_token_generator.make_token(instance)
-        Tokens.objects.create(token=token, user=instance)
-        user_created.send(sender=sender, token=token)
+        if settings.SIGNED_ACTIVATION_TOKENS:
+            token = make_activation_token(instance)
+        else:
+            token = default_token_generator.make_token(instance)
+            Tokens.objects.create(token=token, user=instance)
+
+        notify_user_created(token)
 
 
 @receiver(post_save, sender=Otp)
@@ -25,4 +89,15 @@ def after_otp_created(sender, instance, created, **kwargs):
     """will be called when new otp is created"""
     if created:
         """we will send the otp"""
-        otp_created.send(sender=sender, instance=instance)
+        notify_otp_created(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    """
+    Drop the cached copy so deactivation and password changes apply. It is
+    dropped after commit, a request reading the old row before that would
+    cache it again.
+    """
+    transaction.on_commit(partial(user_cache.invalidate, instance.pk), using)
@@ -0,0 +1,62 @@
+import json
+from urllib.parse import urlencode
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import AsyncRequestFactory, RequestFactory
+from rest_framework.utils.encoders import JSONEncoder
+from authentication.cache import user_cache
+
+
+def create_user(email="user@example.com", phone="1234567890", **fields):
+    """a user with the fields the tests do not care about filled in"""
+    return get_user_model().objects.create(
+        email=email,
+        phone=phone,
+        **{
+            "password": "password",
+            "first_name": "first",
+            "last_name": "last",
+            **fields
+        }
+    )
+
+
+class ViewParityMixin:
+    """run a scenario against drf views and the async views replacing them"""
+
+    def request(self, view, method, data=None,
+                content_type="application/json", token=None):
+        """status and json body of a request to the view"""
+        if content_type == "application/json" and data is not None:
+            data = json.dumps(data)
+        elif content_type == "application/x-www-form-urlencoded":
+            data = urlencode(data)
+
+        caches["throttle"].clear()
+        user_cache.clear()
+        factory = AsyncRequestFactory() if view.view_is_async else (
+            RequestFactory()
+        )
+        request = factory.generic(
+            method,
+            "/",
+            data or "",
+            content_type=content_type,
+            headers={"Authorization": f"Token {token}"} if token else {}
+        )
+
+        if view.view_is_async:
+            res = async_to_sync(view.as_view())(request)
+            return res.status_code, json.loads(res.content)
+
+        res = view.as_view()(request)
+        return res.status_code, json.loads(
+            json.dumps(res.data, cls=JSONEncoder)
+        )
+
+    def assertParity(self, scenario, sync_views, async_views):
+        self.assertEqual(
+            scenario(*async_views),
+            scenario(*sync_views)
+        )
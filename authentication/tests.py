@@ -0,0 +1,1278 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import skipUnless
+from asgiref.sync import async_to_sync
+from rest_framework.exceptions import ValidationError
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.conf import settings
+from django.contrib.auth.signals import user_login_failed
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import urlsafe_base64_encode
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from authentication.authenticate import StatelessAuthentication
+from authentication import async_views, outbox, views
+from authentication.activation import make_activation_token
+from authentication.bulk import update_users
+from authentication.cache import UserCache, user_cache
+from authentication.hashing import (
+    CalibratedPBKDF2PasswordHasher,
+    PasswordHasherPool
+)
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from authentication.helper import get_user_tokens, refresh_token
+from authentication.importing import UserImport
+from authentication.jobs import delete_outbox_entries
+from authentication.last_login import LastLoginRecorder, last_login_recorder
+from authentication.purge import Purge, expired_otps
+from authentication.revocation import revocation_index
+from authentication.sessions import live_sessions, revoke_sessions
+from authentication.models import Otp, Outbox, TokenFamily, Tokens
+from authentication.otp import BaseOtpStore, CacheOtpStore, ModelOtpStore
+from authentication.serializer import (
+    TokenSerializer,
+    UserModelSerializer,
+    UserTokenObtainPairSerializer
+)
+from authentication.throttling import SlidingWindowScopedThrottle
+from authentication.testing import ViewParityMixin, create_user
+
+
+class TokenSerializerTest(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.token = Tokens.objects.get(user=self.user).token
+
+    def test_verification_query_budget(self):
+        """select, savepoint, two conditional updates, release"""
+        serializer = TokenSerializer(data={"token": self.token})
+
+        with self.assertNumQueries(5):
+            self.assertTrue(serializer.is_valid())
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertFalse(Tokens.objects.get(user=self.user).is_valid)
+
+    def test_token_can_be_used_once(self):
+        self.assertTrue(TokenSerializer(data={"token": self.token}).is_valid())
+
+        serializer = TokenSerializer(data={"token": self.token})
+
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+
+        self.assertIn("token", serializer.errors)
+
+
+class SlidingWindowThrottleTest(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        settings = override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+            "throttle": {
+                "BACKEND": "core.cache.SQLiteCache",
+                "LOCATION": os.path.join(directory, "throttle.sqlite3"),
+            },
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.view = type("View", (), {"throttle_scope": "test"})()
+        self.request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        self.request.user = AnonymousUser()
+
+    def make_throttle(self, rate="3/minute", now=600.0):
+        throttle = SlidingWindowScopedThrottle()
+        throttle.THROTTLE_RATES = {"test": rate}
+        throttle.timer = lambda: now
+        return throttle
+
+    def test_limit(self):
+        for _ in range(3):
+            self.assertTrue(
+                self.make_throttle().allow_request(self.request, self.view)
+            )
+
+        throttle = self.make_throttle()
+        self.assertFalse(throttle.allow_request(self.request, self.view))
+        self.assertEqual(throttle.current, 3)
+        self.assertGreater(throttle.wait(), 0)
+
+    def test_previous_window_slides_out(self):
+        for _ in range(3):
+            self.make_throttle().allow_request(self.request, self.view)
+
+        """most of the previous window is still inside the last minute"""
+        self.assertFalse(
+            self.make_throttle(now=665.0).allow_request(
+                self.request,
+                self.view
+            )
+        )
+        self.assertTrue(
+            self.make_throttle(now=700.0).allow_request(
+                self.request,
+                self.view
+            )
+        )
+
+    def test_concurrent_incr(self):
+        cache = caches["throttle"]
+        cache.set("counter", 0)
+
+        def incr():
+            for _ in range(50):
+                caches["throttle"].incr("counter")
+
+        threads = [threading.Thread(target=incr) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(cache.get("counter"), 400)
+
+
+class BulkUpdateUsersTest(TestCase):
+    def setUp(self):
+        self.users = [
+            create_user(
+                email=f"user{i}@example.com",
+                phone=f"12345678{i}",
+                is_active=True
+            )
+            for i in range(3)
+        ]
+
+        for user in self.users:
+            get_user_tokens(user)
+
+    def test_deactivate_and_logout(self):
+        users = get_user_model().objects.filter(
+            pk__in=[user.pk for user in self.users[:2]]
+        )
+
+        """select, blacklist insert, family update and user update"""
+        with self.assertNumQueries(6):
+            counts = update_users(users, {"is_active": False}, logout=True)
+
+        self.assertEqual(counts["updated"], 2)
+        self.assertEqual(counts["blacklisted"], 2)
+        self.assertEqual(
+            get_user_model().objects.filter(is_active=True).count(),
+            1
+        )
+
+        counts = update_users(
+            get_user_model().objects.filter(is_active=False),
+            {"is_active": True},
+            logout=True
+        )
+        self.assertEqual(counts["updated"], 2)
+        self.assertEqual(counts["blacklisted"], 0)
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+
+class SessionsTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+
+    def test_revoke_all_includes_rotated_tokens(self):
+        get_user_tokens(self.user)
+        token = refresh_token(get_user_tokens(self.user)["refresh_token"])
+        token.rotate()
+
+        self.assertEqual(live_sessions(user=self.user).count(), 2)
+
+        """the insert and the revocation index poll after commit"""
+        with self.assertNumQueries(2), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            self.assertEqual(revoke_sessions(live_sessions(user=self.user)), 2)
+
+        with self.assertRaises(TokenError):
+            refresh_token(str(token))
+
+    def test_rotation_moves_the_session_row(self):
+        old = get_user_tokens(self.user)["refresh_token"]
+        session = OutstandingToken.objects.get()
+        token = refresh_token(old)
+
+        with self.assertNumQueries(1):
+            token.rotate()
+
+        async_to_sync(token.arotate)()
+
+        session.refresh_from_db()
+        self.assertEqual(session.jti, token["jti"])
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+        """the replayed token has no row left to move"""
+        with self.assertRaises(TokenError):
+            refresh_token(old).rotate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke_sessions(live_sessions(user=self.user, pk=session.pk))
+
+        with self.assertRaises(TokenError):
+            refresh_token(str(token))
+
+
+class LastLoginRecorderTest(TestCase):
+    def setUp(self):
+        self.users = [
+            create_user(
+                email=f"user{i}@example.com",
+                phone=f"12345678{i}",
+                is_active=True
+            )
+            for i in range(3)
+        ]
+
+    def test_flush_writes_latest_login_per_user(self):
+        """the thread only waits, the test flushes in its own transaction"""
+        recorder = LastLoginRecorder(flush_interval=3600, batch_size=2)
+        recorder.start()
+        self.addCleanup(recorder.stop)
+        now = timezone.now()
+
+        with self.assertNumQueries(0):
+            for user in self.users:
+                recorder.record(user.pk, now)
+
+            recorder.record(self.users[0].pk, now + timedelta(seconds=1))
+            recorder.record(self.users[0].pk, now - timedelta(seconds=1))
+
+        with self.assertNumQueries(2):
+            self.assertEqual(recorder.flush(), 3)
+
+        self.assertEqual(len(recorder), 0)
+        self.assertEqual(
+            [user.last_login for user in get_user_model().objects.filter(
+                pk__in=[user.pk for user in self.users]
+            ).order_by('pk')],
+            [now + timedelta(seconds=1), now, now]
+        )
+
+    @skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_forked_child_starts_its_own_thread(self):
+        recorder = LastLoginRecorder(flush_interval=3600)
+        recorder.start()
+        self.addCleanup(recorder.stop)
+        recorder.record(self.users[0].pk)
+
+        pid = os.fork()
+
+        if pid == 0:
+            """the child only buffers, os._exit skips the exit flush"""
+            inherited = len(recorder)
+            recorder.record(self.users[1].pk)
+            os._exit(0 if (
+                inherited == 0
+                and len(recorder) == 1
+                and recorder._thread.is_alive()
+            ) else 1)
+
+        _, status = os.waitpid(pid, 0)
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(len(recorder), 1)
+
+    def test_login_writes_through_outside_the_app_server(self):
+        data = {"email": "user0@example.com", "password": "password"}
+        serializer = UserTokenObtainPairSerializer(
+            data=data,
+            context={"request": None}
+        )
+
+        self.assertTrue(serializer.is_valid())
+        self.assertFalse(last_login_recorder.running)
+        self.assertEqual(len(last_login_recorder), 0)
+        self.assertIsNotNone(
+            get_user_model().objects.get(pk=self.users[0].pk).last_login
+        )
+
+        data["email"] = "user1@example.com"
+        serializer = UserTokenObtainPairSerializer(
+            data=data,
+            context={"request": None}
+        )
+
+        self.assertTrue(async_to_sync(serializer.ais_valid)())
+        self.assertEqual(len(last_login_recorder), 0)
+        self.assertIsNotNone(
+            get_user_model().objects.get(pk=self.users[1].pk).last_login
+        )
+
+
+@override_settings(REGISTRATION_FAST_PATH=True)
+class RegistrationFastPathTest(TestCase):
+    data = {
+        "first_name": "first",
+        "last_name": "last",
+        "email": "user@example.com",
+        "phone": "1234567890",
+        "password": "password",
+    }
+
+    def test_insert_without_unique_checks(self):
+        serializer = UserModelSerializer(data=self.data)
+
+        """savepoint, user and token inserts, release"""
+        with self.assertNumQueries(4):
+            self.assertTrue(serializer.is_valid())
+            serializer.save()
+
+    def test_constraint_violation_is_a_field_error(self):
+        get_user_model().objects.create(**self.data)
+
+        serializer = UserModelSerializer(
+            data={**self.data, "phone": "0987654321"}
+        )
+        self.assertTrue(serializer.is_valid())
+
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+
+        self.assertEqual(
+            raised.exception.detail["email"][0].code,
+            "unique"
+        )
+
+    def test_phone_violation_is_a_phone_error(self):
+        get_user_model().objects.create(**self.data)
+
+        serializer = UserModelSerializer(
+            data={**self.data, "email": "other@example.com"}
+        )
+        self.assertTrue(serializer.is_valid())
+
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+
+        self.assertEqual(list(raised.exception.detail), ["phone"])
+
+    def test_values_in_the_message_are_ignored(self):
+        """postgres puts the conflicting values in the message"""
+        class Diag:
+            constraint_name = "authentication_user_phone_key"
+
+        class PostgresError(Exception):
+            diag = Diag()
+
+        try:
+            try:
+                raise PostgresError(
+                    "duplicate key value violates unique constraint\n"
+                    "DETAIL: Key (phone)=(email) already exists."
+                )
+            except PostgresError as cause:
+                raise IntegrityError(*cause.args) from cause
+        except IntegrityError as exc:
+            with self.assertRaises(ValidationError) as raised:
+                UserModelSerializer().fail_unique(exc)
+
+        self.assertEqual(list(raised.exception.detail), ["phone"])
+
+
+class EmailCaseTest(TestCase):
+    def setUp(self):
+        self.user = create_user(email="First.Last@Example.com")
+
+    def test_lookup_ignores_case(self):
+        self.assertEqual(
+            get_user_model().objects.get_by_natural_key(
+                "first.last@EXAMPLE.COM"
+            ),
+            self.user
+        )
+
+    def test_emails_differing_in_case_are_rejected(self):
+        serializer = UserModelSerializer(data={
+            "first_name": "first",
+            "last_name": "last",
+            "email": "first.last@example.com",
+            "phone": "0987654321",
+            "password": "password",
+        })
+        self.assertTrue(serializer.is_valid())
+
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+
+        self.assertIn("email", raised.exception.detail)
+
+
+class UserCacheTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+
+    def test_hits_and_misses_are_counted(self):
+        cache = UserCache()
+
+        self.assertIsNone(cache.get(self.user.pk))
+        cache.set(self.user.pk, self.user)
+
+        cached = cache.get(self.user.pk)
+        self.assertEqual(cached, self.user)
+        self.assertIsNot(cached, self.user)
+        self.assertEqual(
+            cache.stats(),
+            {"hits": 1, "misses": 1, "size": 1}
+        )
+
+    def test_expired_entries_are_dropped(self):
+        cache = UserCache(ttl=0)
+        cache.set(self.user.pk, self.user)
+
+        self.assertIsNone(cache.get(self.user.pk))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_eviction_order(self):
+        for lru, evicted in ((True, 2), (False, 1)):
+            with self.subTest(lru=lru):
+                cache = UserCache(max_size=2, lru=lru)
+                cache.set(1, self.user)
+                cache.set(2, self.user)
+                cache.get(1)
+                cache.set(3, self.user)
+
+                self.assertIsNone(cache.get(evicted))
+                self.assertEqual(cache.stats()["size"], 2)
+
+    def test_save_and_delete_invalidate_after_commit(self):
+        user_id = self.user.pk
+
+        for change in (self.user.save, self.user.delete):
+            with self.subTest(change=change.__name__):
+                user_cache.set(user_id, self.user)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+                    self.assertIsNotNone(user_cache.get(user_id))
+
+                self.assertIsNone(user_cache.get(user_id))
+
+    def test_shared_backend_invalidates_every_worker(self):
+        workers = [UserCache(backend="default") for _ in range(2)]
+        workers[0].set(self.user.pk, self.user)
+
+        self.assertEqual(workers[1].get(self.user.pk), self.user)
+
+        workers[1].invalidate(self.user.pk)
+        self.assertIsNone(workers[0].get(self.user.pk))
+
+
+@override_settings(SIMPLE_JWT={
+    **settings.SIMPLE_JWT,
+    "EMBED_USER_CLAIMS": True
+})
+class StatelessAuthenticationTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+        user_cache.clear()
+
+    def authenticate(self, token):
+        request = RequestFactory().get(
+            "/",
+            headers={"Authorization": f"Token {token}"}
+        )
+        return StatelessAuthentication().authenticate(request)[0]
+
+    def test_user_is_built_from_claims(self):
+        token = get_user_tokens(self.user)["access_token"]
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+
+        self.assertEqual(user.email, self.user.email)
+        self.assertTrue(user.is_active)
+        self.assertFalse(user.is_staff)
+
+    def test_tokens_without_claims_are_looked_up(self):
+        with self.settings(SIMPLE_JWT={
+            **settings.SIMPLE_JWT,
+            "EMBED_USER_CLAIMS": False
+        }):
+            token = get_user_tokens(self.user)["access_token"]
+
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+
+        self.assertEqual(user, self.user)
+
+
+class RevocationIndexTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+        self.tokens = [
+            get_user_tokens(self.user)["refresh_token"] for _ in range(2)
+        ]
+        revocation_index.clear()
+        self.addCleanup(revocation_index.clear)
+
+    def blacklist(self, token, **fields):
+        """a revocation by another worker, the index only sees it polling"""
+        return BlacklistedToken.objects.create(
+            token=OutstandingToken.objects.get(token=token),
+            **fields
+        )
+
+    def test_revoked_token_is_rejected_after_poll(self):
+        refresh_token(self.tokens[0])
+        self.blacklist(self.tokens[0])
+        revocation_index.poll()
+
+        with self.assertRaises(TokenError):
+            refresh_token(self.tokens[0])
+
+        refresh_token(self.tokens[1])
+
+    def test_late_commit_below_polled_ids_is_seen(self):
+        first = self.blacklist(self.tokens[0])
+        self.blacklist(self.tokens[1])
+
+        """the first row is not committed yet when the index polls"""
+        pk = first.pk
+        first.delete()
+        revocation_index.poll()
+        BlacklistedToken.objects.create(
+            pk=pk,
+            token=first.token,
+            blacklisted_at=first.blacklisted_at
+        )
+        revocation_index.poll()
+
+        with self.assertRaises(TokenError):
+            refresh_token(self.tokens[0])
+
+    def test_settled_rows_are_not_read_again(self):
+        self.blacklist(self.tokens[0])
+        BlacklistedToken.objects.update(
+            blacklisted_at=timezone.now() - timedelta(minutes=1)
+        )
+        revocation_index.poll()
+
+        self.assertEqual(
+            list(revocation_index._pending(timezone.now())),
+            []
+        )
+
+
+@override_settings(
+    SIMPLE_JWT={**settings.SIMPLE_JWT, "REFRESH_TOKEN_FAMILIES": True},
+    CACHES={
+        **settings.CACHES,
+        "throttle": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "token-family-test",
+        },
+    }
+)
+class TokenFamilyTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True, is_admin=True)
+        self.tokens = get_user_tokens(self.user)
+
+    def test_replay_revokes_the_family(self):
+        token = refresh_token(self.tokens["refresh_token"])
+        token.rotate()
+
+        with self.assertRaises(TokenError):
+            refresh_token(self.tokens["refresh_token"]).rotate()
+
+        with self.assertRaises(TokenError):
+            refresh_token(str(token)).rotate()
+
+        self.assertEqual(live_sessions(user=self.user).count(), 0)
+
+    def test_token_without_family_is_invalid(self):
+        with self.settings(SIMPLE_JWT={
+            **settings.SIMPLE_JWT,
+            "REFRESH_TOKEN_FAMILIES": False
+        }):
+            tokens = get_user_tokens(self.user)
+
+        with self.assertRaises(InvalidToken):
+            refresh_token(tokens["refresh_token"])
+
+        self.client.cookies["access"] = self.tokens["access_token"]
+        self.client.cookies["refresh"] = tokens["refresh_token"]
+
+        res = self.client.post("/api/auth/admin/refresh/")
+        self.assertEqual(res.status_code, 401)
+
+        res = self.client.post("/api/auth/admin/logout/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.cookies["refresh"].value, "")
+
+    def test_admin_refresh_replay_is_unauthorized(self):
+        refresh_token(self.tokens["refresh_token"]).rotate()
+        self.client.cookies["access"] = self.tokens["access_token"]
+        self.client.cookies["refresh"] = self.tokens["refresh_token"]
+
+        res = self.client.post("/api/auth/admin/refresh/")
+
+        self.assertEqual(res.status_code, 401)
+
+    def test_admin_refresh_without_cookie_is_unauthorized(self):
+        self.client.cookies["access"] = self.tokens["access_token"]
+
+        res = self.client.post("/api/auth/admin/refresh/")
+
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(TokenFamily.objects.get().generation, 0)
+
+
+class OtpVerifyTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+        self.otp = Otp.objects.create(user=self.user, otp="123456")
+
+    def test_verify_is_one_update(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(Otp.objects.verify(self.user, "123456"))
+
+        self.otp.refresh_from_db()
+        self.assertTrue(self.otp.is_valid)
+
+    def test_otp_is_verified_once(self):
+        self.assertTrue(Otp.objects.verify(self.user, "123456"))
+        self.assertFalse(Otp.objects.verify(self.user, "123456"))
+
+    def test_expired_and_wrong_otps_are_rejected(self):
+        self.assertFalse(Otp.objects.verify(self.user, "654321"))
+
+        Otp.objects.filter(pk=self.otp.pk).update(
+            date_created=timezone.now() - Otp.LIFETIME
+        )
+        self.assertFalse(Otp.objects.verify(self.user, "123456"))
+
+
+class OtpIssueTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+
+    def test_issue_replaces_the_otp_of_the_user(self):
+        Otp.objects.issue(self.user, "123456")
+        Otp.objects.verify(self.user, "123456")
+
+        with self.assertNumQueries(1):
+            Otp.objects.issue(self.user, "654321")
+
+        otp = Otp.objects.get(user=self.user)
+        self.assertEqual(otp.otp, "654321")
+        self.assertFalse(otp.is_valid)
+        self.assertTrue(Otp.objects.verify(self.user, "654321"))
+
+    def test_one_otp_row_per_user(self):
+        Otp.objects.issue(self.user, "123456")
+
+        with self.assertRaises(IntegrityError):
+            Otp.objects.create(user=self.user, otp="654321")
+
+
+class OtpStoreTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+        caches["default"].clear()
+
+    def stores(self):
+        for store in (ModelOtpStore(), CacheOtpStore()):
+            with self.subTest(store=type(store).__name__):
+                yield store
+
+    def test_otp_is_verified_once(self):
+        for store in self.stores():
+            otp = store.issue(self.user)
+
+            self.assertEqual(store.check(self.user, otp), store.UNVERIFIED)
+            self.assertEqual(store.verify(self.user, otp), store.VERIFIED)
+            self.assertEqual(store.verify(self.user, otp), store.EXPIRED)
+            self.assertEqual(store.check(self.user, otp), store.VERIFIED)
+
+    def test_wrong_otp_is_invalid(self):
+        for store in self.stores():
+            otp = store.issue(self.user)
+            wrong = "000000" if otp != "000000" else "111111"
+
+            self.assertEqual(store.verify(self.user, wrong), store.INVALID)
+            self.assertEqual(store.check(self.user, wrong), store.INVALID)
+
+    def test_new_otp_is_unverified(self):
+        for store in self.stores():
+            store.verify(self.user, store.issue(self.user))
+            otp = store.issue(self.user)
+
+            self.assertEqual(store.check(self.user, otp), store.UNVERIFIED)
+
+    async def test_async_verify(self):
+        for store in self.stores():
+            otp = await store.aissue(self.user)
+
+            self.assertEqual(
+                await store.acheck(self.user, otp),
+                store.UNVERIFIED
+            )
+            self.assertEqual(
+                await store.averify(self.user, otp),
+                store.VERIFIED
+            )
+            self.assertEqual(
+                await store.averify(self.user, otp),
+                store.EXPIRED
+            )
+
+    def test_concurrent_cache_verifies_consume_once(self):
+        store = CacheOtpStore()
+        otp = store.issue(self.user)
+        cache = store.cache
+        barrier = threading.Barrier(2)
+        statuses = []
+
+        class RacingCache:
+            """both verifies read the otp before either consumes it"""
+
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+            def get(self, *args, **kwargs):
+                value = cache.get(*args, **kwargs)
+                barrier.wait(timeout=5)
+                return value
+
+        store.cache = RacingCache()
+        threads = [
+            threading.Thread(
+                target=lambda: statuses.append(store.verify(self.user, otp))
+            )
+            for _ in range(2)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            sorted(statuses),
+            [BaseOtpStore.EXPIRED, BaseOtpStore.VERIFIED]
+        )
+
+
+@override_settings(SIGNED_ACTIVATION_TOKENS=True)
+class SignedActivationTokenTest(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.token = make_activation_token(self.user)
+
+    def test_no_token_row_is_written(self):
+        self.assertFalse(Tokens.objects.filter(user=self.user).exists())
+
+    def test_token_activates_once(self):
+        self.assertTrue(TokenSerializer(data={"token": self.token}).is_valid())
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertFalse(
+            TokenSerializer(data={"token": self.token}).is_valid()
+        )
+
+    def test_token_is_rejected_after_deactivation(self):
+        self.assertTrue(TokenSerializer(data={"token": self.token}).is_valid())
+
+        update_users(
+            get_user_model().objects.filter(pk=self.user.pk),
+            {"is_active": False}
+        )
+
+        self.assertFalse(
+            TokenSerializer(data={"token": self.token}).is_valid()
+        )
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_forged_tokens_are_rejected(self):
+        _, _, signature = self.token.partition(".")
+        uid = urlsafe_base64_encode(str(2 ** 64).encode())
+
+        for token in (f"{uid}.{signature}", f"{self.token}x", "x.y"):
+            with self.subTest(token=token):
+                self.assertFalse(
+                    TokenSerializer(data={"token": token}).is_valid()
+                )
+
+
+@override_settings(OUTBOX={
+    **settings.OUTBOX,
+    "ENABLED": True,
+    "DRAIN_IN_PROCESS": False
+})
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.published = []
+
+        def fail(payload):
+            raise ConnectionError("unreachable")
+
+        outbox.register("test", self.published.append)
+        outbox.register("failing", fail)
+        self.addCleanup(outbox._publishers.pop, "test")
+        self.addCleanup(outbox._publishers.pop, "failing")
+
+    def test_entries_are_published_once(self):
+        outbox.write("test", {"number": 1})
+        outbox.write_many("test", [{"number": 2}, {"number": 3}])
+
+        self.assertEqual(outbox.drain(), 3)
+        self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(
+            self.published,
+            [{"number": 1}, {"number": 2}, {"number": 3}]
+        )
+        self.assertFalse(
+            Outbox.objects.filter(date_published__isnull=True).exists()
+        )
+
+    def test_failing_entries_do_not_block_the_outbox(self):
+        outbox.write("failing", {})
+        outbox.write("unknown", {})
+        outbox.write("test", {"number": 1})
+
+        with self.assertLogs("authentication.outbox", "ERROR"):
+            self.assertEqual(outbox.drain(), 3)
+
+        self.assertEqual(self.published, [{"number": 1}])
+
+        failed = Outbox.objects.filter(date_published__isnull=True)
+        self.assertEqual(failed.count(), 2)
+
+        for entry in failed:
+            self.assertEqual(entry.attempts, 1)
+            self.assertGreater(entry.next_attempt_at, timezone.now())
+            self.assertTrue(entry.last_error)
+
+        """retried after the backoff only"""
+        self.assertEqual(outbox.drain(), 0)
+
+        failed.update(next_attempt_at=timezone.now())
+
+        with self.assertLogs("authentication.outbox", "ERROR"):
+            self.assertEqual(outbox.drain(), 2)
+
+        self.assertEqual(
+            sorted(failed.values_list("attempts", flat=True)),
+            [2, 2]
+        )
+
+    def test_old_entries_are_deleted(self):
+        old = timezone.now() - timedelta(
+            seconds=settings.OUTBOX["RETENTION"] + 1
+        )
+        outbox.write("test", {"state": "published long ago"})
+        outbox.write("test", {"state": "given up long ago"})
+        outbox.write("test", {"state": "published"})
+        outbox.write("test", {"state": "pending"})
+        entries = Outbox.objects.order_by("id")
+
+        entries.filter(pk=entries[0].pk).update(date_published=old)
+        entries.filter(pk=entries[1].pk).update(
+            date_created=old,
+            attempts=settings.OUTBOX["MAX_ATTEMPTS"]
+        )
+        entries.filter(pk=entries[2].pk).update(date_published=timezone.now())
+
+        self.assertEqual(delete_outbox_entries(), 2)
+        self.assertEqual(
+            [entry.payload["state"] for entry in entries],
+            ["published", "pending"]
+        )
+
+
+@override_settings(PASSWORD_HASHING={"WORKERS": 0, "ITERATIONS": 1000})
+class PasswordHashingTest(TestCase):
+    def encode(self, iterations, salt=None):
+        hasher = CalibratedPBKDF2PasswordHasher()
+        return hasher.encode("password", salt or hasher.salt(), iterations)
+
+    def test_only_weaker_hashes_are_updated(self):
+        hasher = CalibratedPBKDF2PasswordHasher()
+
+        self.assertTrue(hasher.must_update(self.encode(500)))
+        self.assertFalse(hasher.must_update(self.encode(1000)))
+        self.assertFalse(hasher.must_update(self.encode(2000)))
+
+    def test_short_salts_are_updated(self):
+        hasher = CalibratedPBKDF2PasswordHasher()
+
+        self.assertTrue(hasher.must_update(self.encode(1000, "salt")))
+        self.assertTrue(hasher.must_update(self.encode(2000, "salt")))
+
+    def test_login_keeps_a_stronger_hash(self):
+        user = create_user()
+
+        for iterations, rehashed in ((2000, False), (500, True)):
+            with self.subTest(iterations=iterations):
+                user.password = self.encode(iterations)
+
+                self.assertTrue(user.check_password("password"))
+                self.assertEqual(
+                    user.password.startswith("pbkdf2_sha256$1000$"),
+                    rehashed
+                )
+
+    def test_pool_workers(self):
+        pool = PasswordHasherPool(workers=1)
+        self.addCleanup(pool.shutdown)
+
+        encoded = pool.make_password("password")
+
+        self.assertTrue(pool.verify_password("password", encoded)[0])
+        self.assertFalse(pool.verify_password("wrong", encoded)[0])
+        self.assertEqual(len(pool.make_passwords(["a", "b", "c"])), 3)
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "async-view-parity-test",
+    },
+})
+class AsyncViewParityTest(ViewParityMixin, TestCase):
+    """the async views answer like the drf views they replace"""
+
+    def setUp(self):
+        self.user = create_user(is_active=True)
+
+    def test_login(self):
+        failed = []
+
+        def receiver(credentials, **kwargs):
+            failed.append(credentials["email"])
+
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+
+        def scenario(view):
+            results = []
+
+            for email, password in (
+                ("USER@example.com", "password"),
+                ("user@example.com", "wrong"),
+                ("unknown@example.com", "password"),
+            ):
+                status, body = self.request(
+                    view,
+                    "post",
+                    {"email": email, "password": password}
+                )
+                results.append((status, sorted(body)))
+
+            return results
+
+        self.assertParity(
+            scenario,
+            [views.LoginUserTokenView],
+            [async_views.LoginUserTokenView]
+        )
+        self.assertEqual(len(failed), 4)
+
+    def test_refresh(self):
+        def scenario(view):
+            token = get_user_tokens(self.user)["refresh_token"]
+            refreshed = self.request(view, "post", {"refresh": token})
+            replayed = self.request(view, "post", {"refresh": token})
+
+            return [
+                (refreshed[0], sorted(refreshed[1])),
+                replayed,
+            ]
+
+        self.assertParity(
+            scenario,
+            [views.RefreshTokenPair],
+            [async_views.RefreshTokenPair]
+        )
+
+    def test_forgot_password(self):
+        email = {"email": self.user.email}
+
+        def scenario(forgot, verify, update):
+            results = [self.request(forgot, "post", email)]
+            otp = Otp.objects.get(user=self.user).otp
+            wrong = "000000" if otp != "000000" else "111111"
+
+            for data in ({"otp": wrong}, {"otp": otp}, {"otp": otp}):
+                results.append(self.request(verify, "post", {**email, **data}))
+
+            results.append(self.request(
+                update,
+                "patch",
+                {**email, "otp": otp, "password": "changed"}
+            ))
+            return results
+
+        self.assertParity(
+            scenario,
+            [
+                views.ForgotPassword,
+                views.ForgotPasswordVerifyOtp,
+                views.ForgotPasswordUpdate
+            ],
+            [
+                async_views.ForgotPassword,
+                async_views.ForgotPasswordVerifyOtp,
+                async_views.ForgotPasswordUpdate
+            ]
+        )
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("changed"))
+
+
+class PurgeTest(TestCase):
+    def setUp(self):
+        self.users = [
+            create_user(email=f"user{i}@example.com", phone=f"12345678{i}")
+            for i in range(5)
+        ]
+
+    def test_expired_otps_are_deleted_in_batches(self):
+        for user in self.users:
+            Otp.objects.issue(user, "123456")
+
+        Otp.objects.filter(user__in=self.users[:3]).update(
+            date_created=timezone.now() - Otp.LIFETIME
+        )
+        _, queryset = expired_otps()[0]
+        purge = Purge(queryset, batch_size=2)
+
+        """no signals or cascades, a select and a DELETE per batch"""
+        self.assertTrue(purge.is_fast())
+
+        with self.assertNumQueries(5):
+            self.assertEqual(list(purge.batches()), [2, 1])
+
+        self.assertEqual(
+            set(Otp.objects.values_list("user", flat=True)),
+            {user.pk for user in self.users[3:]}
+        )
+
+    def test_expired_refresh_tokens_command(self):
+        for user in self.users:
+            get_user_tokens(user)
+
+        expired = OutstandingToken.objects.filter(user__in=self.users[:3])
+        expired.update(expires_at=timezone.now())
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token=token) for token in expired]
+        )
+        stdout = io.StringIO()
+
+        call_command(
+            "deleteexpiredrefreshtokens",
+            "--batch-size=2",
+            stdout=stdout
+        )
+
+        self.assertIn("Complete", stdout.getvalue())
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list("user", flat=True)),
+            {user.pk for user in self.users[3:]}
+        )
+
+    def test_dry_run_and_time_budget_delete_nothing(self):
+        Tokens.objects.update(is_valid=False)
+        stdout = io.StringIO()
+
+        call_command("deleteexpiredtokens", "--dry-run", stdout=stdout)
+        call_command("deleteexpiredtokens", "--max-seconds=0", stdout=stdout)
+
+        self.assertIn("Would delete 5 token entries", stdout.getvalue())
+        self.assertIn("Time budget used up", stdout.getvalue())
+        self.assertEqual(Tokens.objects.count(), 5)
+
+
+class UserImportTest(TestCase):
+    def setUp(self):
+        self.existing = create_user(email="existing@example.com")
+        self.importer = UserImport(PasswordHasherPool(workers=0))
+
+    def row(self, email, phone, **fields):
+        return {
+            "first_name": "first",
+            "last_name": "last",
+            "email": email,
+            "phone": phone,
+            "password": "password",
+            **fields
+        }
+
+    def test_invalid_rows_are_rejected(self):
+        created = self.importer.add([
+            (2, self.row("new@example.com", "1000000001")),
+            (3, self.row("not-an-email", "1000000002")),
+            (4, self.row("long@example.com", "1" * 16)),
+            (5, self.row("blank@example.com", "1000000003", last_name="")),
+            (6, self.row("NEW@example.com", "1000000004")),
+            (7, self.row("EXISTING@example.com", "1000000005")),
+        ])
+
+        self.assertEqual(created, 1)
+        self.assertEqual(
+            [line for line, _ in self.importer.rejected],
+            [3, 4, 5, 6, 7]
+        )
+        self.assertIn("email:", self.importer.rejected[0][1])
+        self.assertIn("phone:", self.importer.rejected[1][1])
+        self.assertIn("last_name:", self.importer.rejected[2][1])
+
+        user = get_user_model().objects.get(email="new@example.com")
+        self.assertTrue(user.check_password("password"))
+        self.assertTrue(Tokens.objects.filter(user=user).exists())
+
+    def test_concurrent_registration_is_rejected_per_row(self):
+        """both checks miss a user registered after them"""
+        self.importer.existing = lambda emails, phones: (set(), set())
+
+        created = self.importer.add([
+            (2, self.row("new@example.com", "1000000001")),
+            (3, self.row("existing@example.com", "1000000002")),
+            (4, self.row("other@example.com", "1234567890")),
+            (5, self.row("last@example.com", "1000000003")),
+        ])
+
+        self.assertEqual(created, 2)
+        self.assertEqual(self.importer.created, 2)
+        self.assertEqual(
+            [line for line, _ in self.importer.rejected],
+            [3, 4]
+        )
+        self.assertEqual(
+            set(get_user_model().objects.values_list("email", flat=True)),
+            {"existing@example.com", "new@example.com", "last@example.com"}
+        )
+
+
+class AdminUserListTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.admin = create_user(
+            email="admin@example.com",
+            phone="1000000000",
+            is_active=True,
+            is_admin=True
+        )
+        for i in range(5):
+            create_user(
+                email=f"user{i}@example.com",
+                phone=f"12345678{i}",
+                is_active=i % 2 == 0
+            )
+
+        """equal timestamps make the id decide the order"""
+        get_user_model().objects.update(date_created=timezone.now())
+
+        self.client.cookies[settings.SIMPLE_JWT["AUTH_COOKIE"]] = (
+            get_user_tokens(self.admin)["access_token"]
+        )
+
+    def test_pages_cover_every_user_once(self):
+        ids = []
+        url = reverse("authentication_admin:users") + "?page_size=2"
+
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            self.assertLessEqual(len(res.data["results"]), 2)
+
+            ids.extend(user["id"] for user in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(
+            ids,
+            list(get_user_model().objects.order_by(
+                "-date_created",
+                "-id"
+            ).values_list("id", flat=True))
+        )
+
+    def test_filters_and_invalid_parameters(self):
+        url = reverse("authentication_admin:users")
+
+        res = self.client.get(url, {"is_active": "false"})
+        self.assertEqual(
+            {user["email"] for user in res.data["results"]},
+            {"user1@example.com", "user3@example.com"}
+        )
+        self.assertIsNone(res.data["next"])
+
+        self.assertEqual(
+            self.client.get(url, {"is_active": "maybe"}).status_code,
+            400
+        )
+        self.assertEqual(
+            self.client.get(url, {"cursor": "garbage"}).status_code,
+            404
+        )
+
+    def test_export(self):
+        url = "authentication_admin:users-export"
+
+        res = self.client.get(
+            reverse(url, args=["csv"]),
+            {"is_admin": "false"}
+        )
+        self.assertTrue(res.streaming)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["id", "email"])
+        self.assertEqual(len(lines), 6)
+
+        res = self.client.get(reverse(url, args=["ndjson"]))
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]["email"], "admin@example.com")
+
+        self.assertEqual(
+            self.client.get(reverse(url, args=["xml"])).status_code,
+            404
+        )
+
+    def test_admins_only(self):
+        self.client.cookies[settings.SIMPLE_JWT["AUTH_COOKIE"]] = (
+            get_user_tokens(
+                get_user_model().objects.get(email="user0@example.com")
+            )["access_token"]
+        )
+
+        res = self.client.get(reverse("authentication_admin:users"))
+        self.assertEqual(res.status_code, 403)
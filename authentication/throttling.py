@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import ScopedRateThrottle
+
+
+class SlidingWindowScopedThrottle(ScopedRateThrottle):
+    """
+    ScopedRateThrottle counting requests in two fixed windows.
+
+    The rate over the last duration is estimated as the count of the current
+    window plus the share of the previous window still inside it. Each key
+    only holds two integers which are updated with an atomic incr on the
+    THROTTLE_CACHE alias, so the limit holds across worker processes when
+    that cache is shared.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE]
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, elapsed = divmod(int(self.now), self.duration)
+        self.elapsed = elapsed / self.duration
+
+        current_key = f'{self.key}_{window}'
+        self.previous = self.cache.get(f'{self.key}_{window - 1}', 0)
+
+        """count first, so concurrent requests can not all pass the check"""
+        self.cache.add(current_key, 0, 2 * self.duration)
+        self.current = self.cache.incr(current_key)
+
+        if self.estimate() > self.num_requests:
+            self.cache.decr(current_key)
+            self.current -= 1
+            return self.throttle_failure()
+
+        return True
+
+    def estimate(self):
+        return self.previous * (1 - self.elapsed) + self.current
+
+    def wait(self):
+        """seconds until the estimate drops below the limit again"""
+        if self.current < self.num_requests and self.previous:
+            """the previous window has to slide out far enough"""
+            share = (self.num_requests - self.current) / self.previous
+            return max(1 - share - self.elapsed, 0) * self.duration
+
+        if not self.current:
+            return None
+
+        """wait for the next window and for this one to slide out"""
+        share = self.num_requests / self.current
+        return (1 - self.elapsed + 1 - share) * self.duration
@@ -0,0 +1,261 @@
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import (
+    InvalidToken,
+    TokenBackendError,
+    TokenError
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken, Token
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+from authentication.models import TokenFamily
+from authentication.revocation import revocation_index
+
+
+class AsyncRefreshToken(RefreshToken):
+    """refresh token whose database work can also be awaited"""
+
+    @classmethod
+    async def afrom_token(cls, token):
+        """decode and verify like the constructor, awaiting the db checks"""
+        instance = cls.__new__(cls)
+        instance.token = token
+        instance.current_time = aware_utcnow()
+
+        try:
+            instance.payload = instance.get_token_backend().decode(token)
+        except TokenBackendError:
+            raise TokenError("Token is invalid or expired")
+
+        """exp, jti and type checks without the blocking blacklist lookup"""
+        Token.verify(instance)
+        await instance.acheck_blacklist()
+
+        return instance
+
+    @classmethod
+    async def afor_user(cls, user):
+        token = super(BlacklistMixin, cls).for_user(user)
+
+        await OutstandingToken.objects.acreate(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token["exp"]),
+        )
+
+        return token
+
+    async def acheck_blacklist(self):
+        if await BlacklistedToken.objects.filter(
+            token__jti=self.payload[api_settings.JTI_CLAIM]
+        ).aexists():
+            raise TokenError("Token is blacklisted")
+
+    async def ablacklist(self):
+        token, _ = await OutstandingToken.objects.aget_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+
+        return await BlacklistedToken.objects.aget_or_create(token=token)
+
+    def rotate(self):
+        """
+        Move the outstanding row of this token on to the next one, so a
+        session keeps one row however often it is refreshed. The row of a
+        token already rotated or revoked matches nothing, which is how a
+        replay is caught.
+        """
+        if not api_settings.BLACKLIST_AFTER_ROTATION:
+            self.renew()
+            return
+
+        session = self._session()
+        self.renew()
+
+        if not session.update(**self._next_session()):
+            raise TokenError("Token is blacklisted")
+
+    async def arotate(self):
+        if not api_settings.BLACKLIST_AFTER_ROTATION:
+            self.renew()
+            return
+
+        session = self._session()
+        self.renew()
+
+        if not await session.aupdate(**self._next_session()):
+            raise TokenError("Token is blacklisted")
+
+    def renew(self):
+        self.set_jti()
+        self.set_exp()
+        self.set_iat()
+
+    def _session(self):
+        return OutstandingToken.objects.filter(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            blacklistedtoken__isnull=True
+        )
+
+    def _next_session(self):
+        return {
+            "jti": self.payload[api_settings.JTI_CLAIM],
+            "token": str(self),
+            "expires_at": datetime_from_epoch(self.payload["exp"]),
+        }
+
+
+class IndexedRefreshToken(AsyncRefreshToken):
+    """refresh token checked against the in memory revocation index"""
+
+    def check_blacklist(self):
+        if revocation_index.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    async def acheck_blacklist(self):
+        if await revocation_index.ais_revoked(
+            self.payload[api_settings.JTI_CLAIM]
+        ):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        revocation_index.add(
+            self.payload[api_settings.JTI_CLAIM],
+            self.payload["exp"]
+        )
+        return blacklisted
+
+    async def ablacklist(self):
+        blacklisted = await super().ablacklist()
+        revocation_index.add(
+            self.payload[api_settings.JTI_CLAIM],
+            self.payload["exp"]
+        )
+        return blacklisted
+
+
+class FamilyRefreshToken(AsyncRefreshToken):
+    """
+    Refresh token bound to a TokenFamily row instead of OutstandingToken.
+
+    The token carries the family id and its generation. Rotation bumps the
+    generation with a single conditional UPDATE, presenting an older
+    generation means the token was replayed and revokes the whole family.
+    """
+
+    no_copy_claims = RefreshToken.no_copy_claims + ("family", "generation")
+
+    @classmethod
+    def for_user(cls, user):
+        """start a new family instead of recording an outstanding token"""
+        token = super(BlacklistMixin, cls).for_user(user)
+
+        family = TokenFamily.objects.create(
+            user=user,
+            expires_at=datetime_from_epoch(token["exp"])
+        )
+
+        token["family"] = family.pk
+        token["generation"] = family.generation
+
+        return token
+
+    @classmethod
+    async def afor_user(cls, user):
+        token = super(BlacklistMixin, cls).for_user(user)
+
+        family = await TokenFamily.objects.acreate(
+            user=user,
+            expires_at=datetime_from_epoch(token["exp"])
+        )
+
+        token["family"] = family.pk
+        token["generation"] = family.generation
+
+        return token
+
+    def check_blacklist(self):
+        """the family row is checked when the token is used"""
+        self.check_claims()
+
+    async def acheck_blacklist(self):
+        self.check_claims()
+
+    def check_claims(self):
+        """
+        Tokens issued before families were enabled, or built without a
+        token string, have no family and are rejected with a 401.
+        """
+        if "family" not in self.payload or "generation" not in self.payload:
+            raise InvalidToken("Token is invalid or expired")
+
+    def check_family(self):
+        """make sure the family is alive and this is its latest generation"""
+        if not self._current_generation().exists():
+            raise TokenError("Token is blacklisted")
+
+    async def acheck_family(self):
+        if not await self._current_generation().aexists():
+            raise TokenError("Token is blacklisted")
+
+    def rotate(self):
+        """advance the family to the next generation"""
+        self.renew()
+
+        if not self._current_generation().update(**self._next_generation()):
+            """an old generation was replayed, revoke the whole session"""
+            self.blacklist()
+            raise TokenError("Token is blacklisted")
+
+        self.payload["generation"] += 1
+
+    async def arotate(self):
+        self.renew()
+
+        if not await self._current_generation().aupdate(
+            **self._next_generation()
+        ):
+            await self.ablacklist()
+            raise TokenError("Token is blacklisted")
+
+        self.payload["generation"] += 1
+
+    def blacklist(self):
+        return self._family().update(
+            is_revoked=True,
+            date_modified=timezone.now()
+        )
+
+    async def ablacklist(self):
+        return await self._family().aupdate(
+            is_revoked=True,
+            date_modified=timezone.now()
+        )
+
+    def _family(self):
+        self.check_claims()
+        return TokenFamily.objects.filter(pk=self.payload["family"])
+
+    def _current_generation(self):
+        return self._family().filter(
+            generation=self.payload["generation"],
+            is_revoked=False
+        )
+
+    def _next_generation(self):
+        return {
+            "generation": F('generation') + 1,
+            "expires_at": datetime_from_epoch(self.payload["exp"]),
+            "date_modified": timezone.now(),
+        }
@@ -1,18 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from authentication.views import (
-    LoginUserTokenView,
-    RefreshTokenPair,
-    RegisterUser,
-    VerifyAndActivateAccount,
-)
+
+if settings.ASYNC_API:
+    from authentication import async_views as views
+else:
+    from authentication import views
 
 
 app_name = "authentication_user"
 
 
 urlpatterns = [
-    path('login/', LoginUserTokenView.as_view(), name='login'),
-    path('refresh/', RefreshTokenPair.as_view(), name='refresh'),
-    path('register/', RegisterUser.as_view(), name='register'),
-    path('verify/', VerifyAndActivateAccount.as_view(), name='verify'),
+    path('login/', views.LoginUserTokenView.as_view(), name='login'),
+    path('refresh/', views.RefreshTokenPair.as_view(), name='refresh'),
+    path('register/', views.RegisterUser.as_view(), name='register'),
+    path(
+        'verify/',
+        views.VerifyAndActivateAccount.as_view(),
+        name='verify'
+    ),
+    path('sessions/', views.UserSessions.as_view(), name='sessions'),
+    path(
+        'sessions/<int:pk>/',
+        views.UserSession.as_view(),
+        name='session'
+    ),
 ]
@@ -4,28 +4,53 @@ from authentication.serializer import (
     OtpSerializer,
     OtpSerializerEmailOnly,
     OtpSerializerPassword,
+    AdminBulkUserSerializer,
     AdminLoginSerializer,
+    AdminUserSerializer,
+    SessionSerializer,
+    SessionsRevokedSerializer,
 )
-from rest_framework.generics import CreateAPIView, GenericAPIView
-from drf_spectacular.utils import extend_schema
-from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.generics import (
+    CreateAPIView,
+    GenericAPIView,
+    ListAPIView
+)
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from authentication.throttling import SlidingWindowScopedThrottle
 from rest_framework.permissions import (
     AllowAny,
     IsAdminUser,
     IsAuthenticated
 )
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView
 )
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from core.export import stream_csv, stream_ndjson
+from core.pagination import KeysetPagination
 from authentication.helper import (
     get_user_tokens,
-    refresh_token
+    refresh_token,
+    rotate_user_tokens
 )
 from django.conf import settings
-from authentication.authenticate import CustomAuthentication
+from authentication.authenticate import (
+    CachedJWTAuthentication,
+    CustomAuthentication
+)
+from authentication.bulk import update_users
+from authentication.sessions import (
+    live_sessions,
+    revoke_sessions,
+    session_values
+)
 
 
 @extend_schema(tags=["User Authentication"])
@@ -34,7 +59,7 @@ class LoginUserTokenView(TokenObtainPairView):
 
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "login"
 
 
@@ -44,7 +69,7 @@ class RefreshTokenPair(TokenRefreshView):
 
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "refresh"
 
 
@@ -55,7 +80,7 @@ class RegisterUser(CreateAPIView):
     serializer_class = UserModelSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "register"
 
 
@@ -64,7 +89,7 @@ class VerifyAndActivateAccount(GenericAPIView):
     serializer_class = TokenSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "verify"
 
     def post(self, request):
@@ -85,7 +110,7 @@ class ForgotPassword(GenericAPIView):
     serializer_class = OtpSerializerEmailOnly
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "forgot"
 
     def post(self, request):
@@ -105,7 +130,7 @@ class ForgotPasswordVerifyOtp(GenericAPIView):
     serializer_class = OtpSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "forgot"
 
     def post(self, request):
@@ -125,7 +150,7 @@ class ForgotPasswordUpdate(GenericAPIView):
     serializer_class = OtpSerializerPassword
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "forgot"
 
     def patch(self, request):
@@ -138,6 +163,42 @@ class ForgotPasswordUpdate(GenericAPIView):
             )
 
 
+@extend_schema(tags=["User Sessions"])
+class UserSessions(GenericAPIView):
+    """list the live sessions of the user or revoke all of them"""
+
+    serializer_class = SessionSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        sessions = session_values(live_sessions(user=request.user))
+        return Response(self.get_serializer(sessions, many=True).data)
+
+    @extend_schema(responses=SessionsRevokedSerializer)
+    def delete(self, request):
+        """one statement however many sessions the user has"""
+        revoked = revoke_sessions(live_sessions(user=request.user))
+        return Response({"revoked": revoked})
+
+
+@extend_schema(tags=["User Sessions"])
+class UserSession(GenericAPIView):
+    """revoke one session of the user"""
+
+    serializer_class = SessionsRevokedSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request, pk):
+        revoked = revoke_sessions(live_sessions(user=request.user, pk=pk))
+
+        if not revoked:
+            raise NotFound()
+
+        return Response({"revoked": revoked})
+
+
 @extend_schema(tags=["Admin Authentication"])
 class LoginAdminUser(GenericAPIView):
     """admin auth will use cookies"""
@@ -145,7 +206,7 @@ class LoginAdminUser(GenericAPIView):
     serializer_class = AdminLoginSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "adminlogin"
 
     def post(self, request):
@@ -184,7 +245,7 @@ class LogoutAdminUser(GenericAPIView):
     serializer_class = AdminLoginSerializer
     authentication_classes = []
     permission_classes = []
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "adminlogin"
 
     def post(self, request):
@@ -195,8 +256,11 @@ class LogoutAdminUser(GenericAPIView):
         )
 
         if refreshToken:
-            token = refresh_token(refreshToken)
-            token.blacklist()
+            try:
+                refresh_token(refreshToken).blacklist()
+            except (TokenError, InvalidToken):
+                """an invalid or revoked token is already logged out"""
+                pass
 
         res = Response()
         res.delete_cookie(settings.SIMPLE_JWT['AUTH_COOKIE'])
@@ -212,16 +276,25 @@ class RefreshAdminUser(GenericAPIView):
     serializer_class = AdminLoginSerializer
     authentication_classes = [CustomAuthentication]
     permission_classes = [IsAuthenticated, IsAdminUser]
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [SlidingWindowScopedThrottle]
     throttle_scope = "adminlogin"
 
     def post(self, request):
         refreshToken = request.COOKIES.get(
             settings.SIMPLE_JWT['AUTH_COOKIE_REFRESH']
         )
-        token = refresh_token(refreshToken)
-        token.blacklist()
-        tokens = get_user_tokens(request.user)
+
+        if not refreshToken:
+            """simplejwt would mint a new token out of None"""
+            raise InvalidToken("No refresh token")
+
+        try:
+            token = refresh_token(refreshToken)
+            tokens = rotate_user_tokens(token, request.user)
+        except TokenError as e:
+            """a replayed token revokes its session, like TokenRefreshView"""
+            raise InvalidToken(e.args[0])
+
         res = Response()
         res.set_cookie(
             key=settings.SIMPLE_JWT["AUTH_COOKIE"],
@@ -240,3 +313,110 @@ class RefreshAdminUser(GenericAPIView):
             samesite=settings.SIMPLE_JWT["AUTH_COOKIE_SAMESITE"],
         )
         return res
+
+
+class AdminUserFilterMixin:
+    """filter the users on the boolean query parameters"""
+
+    boolean_filters = ('is_active', 'is_admin')
+
+    def get_queryset(self):
+        queryset = get_user_model().objects.all()
+
+        for field in self.boolean_filters:
+            value = self.request.query_params.get(field)
+
+            if value is None:
+                continue
+
+            if value.lower() not in ('true', 'false', '1', '0'):
+                raise ValidationError({field: "Must be true or false"})
+
+            queryset = queryset.filter(
+                **{field: value.lower() in ('true', '1')}
+            )
+
+        return queryset
+
+
+user_filter_parameters = [
+    OpenApiParameter('is_active', OpenApiTypes.BOOL),
+    OpenApiParameter('is_admin', OpenApiTypes.BOOL),
+]
+
+
+@extend_schema(
+    tags=["Admin Users"],
+    parameters=user_filter_parameters + [
+        OpenApiParameter('cursor', OpenApiTypes.STR),
+        OpenApiParameter('page_size', OpenApiTypes.INT),
+    ]
+)
+class AdminUserList(AdminUserFilterMixin, ListAPIView):
+    """list the users, newest first"""
+
+    serializer_class = AdminUserSerializer
+    authentication_classes = [CustomAuthentication]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = KeysetPagination
+
+
+@extend_schema(
+    tags=["Admin Users"],
+    parameters=user_filter_parameters,
+    responses={200: OpenApiTypes.BINARY}
+)
+class AdminUserExport(AdminUserFilterMixin, GenericAPIView):
+    """stream all the matching users as csv or ndjson"""
+
+    serializer_class = AdminUserSerializer
+    authentication_classes = [CustomAuthentication]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    chunk_size = 2000
+
+    formats = {
+        'csv': (stream_csv, 'text/csv'),
+        'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    }
+
+    def get(self, request, kind):
+        if kind not in self.formats:
+            raise NotFound()
+
+        stream, content_type = self.formats[kind]
+        fields = self.serializer_class.Meta.fields
+
+        """rows are fetched chunk by chunk while the response is sent"""
+        rows = self.get_queryset().order_by(
+            '-date_created',
+            '-id'
+        ).values_list(*fields).iterator(chunk_size=self.chunk_size)
+
+        res = StreamingHttpResponse(
+            stream(fields, rows),
+            content_type=content_type
+        )
+        res['Content-Disposition'] = f'attachment; filename="users.{kind}"'
+
+        return res
+
+
+@extend_schema(tags=["Admin Users"])
+class AdminBulkUserUpdate(GenericAPIView):
+    """activate, deactivate, promote or log out many users at once"""
+
+    serializer_class = AdminBulkUserSerializer
+    authentication_classes = [CustomAuthentication]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        counts = update_users(
+            serializer.get_queryset(),
+            serializer.get_values(serializer.validated_data),
+            logout=serializer.validated_data['logout']
+        )
+
+        return Response(counts)
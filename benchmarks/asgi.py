@@ -0,0 +1,215 @@
+"""
+Compare requests/sec of the sync and the async views under uvicorn.
+
+    pip install uvicorn
+    python -m benchmarks.asgi --duration 10 --concurrency 32
+
+Both stacks are served by boilerplate.asgi with benchmarks.settings, only
+ASYNC_API differs. Every run migrates a fresh sqlite database in a
+temporary directory.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import django
+
+
+ENDPOINTS = ("login", "refresh", "profile")
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def setup_database(path):
+    os.environ["BENCHMARK_DB"] = path
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    get_user_model().objects.create(
+        email=EMAIL,
+        password=PASSWORD,
+        phone="0000000000",
+        first_name="bench",
+        last_name="user",
+        is_active=True
+    )
+
+
+def start_server(port, use_async):
+    env = {**os.environ, "BENCHMARK_ASYNC_API": "1" if use_async else "0"}
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn",
+            "boilerplate.asgi:application",
+            "--port", str(port),
+            "--log-level", "warning",
+            "--no-access-log",
+        ],
+        env=env
+    )
+
+    deadline = time.monotonic() + 30
+
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def request(connection, method, path, body=None, token=None):
+    headers = {"Content-Type": "application/json"}
+
+    if token:
+        headers["Authorization"] = f"Token {token}"
+
+    connection.request(
+        method,
+        path,
+        body=json.dumps(body) if body is not None else None,
+        headers=headers
+    )
+    response = connection.getresponse()
+
+    return response.status, response.read()
+
+
+def login(port):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    status, body = request(
+        connection,
+        "POST",
+        "/api/auth/users/login/",
+        {"email": EMAIL, "password": PASSWORD}
+    )
+    connection.close()
+
+    if status != 200:
+        raise RuntimeError(f"login failed with {status}: {body!r}")
+
+    return json.loads(body)
+
+
+def make_call(endpoint, tokens):
+    if endpoint == "login":
+        return (
+            "POST",
+            "/api/auth/users/login/",
+            {"email": EMAIL, "password": PASSWORD},
+            None
+        )
+
+    if endpoint == "refresh":
+        return (
+            "POST",
+            "/api/auth/users/refresh/",
+            {"refresh": tokens["refresh"]},
+            None
+        )
+
+    return ("GET", "/api/profile/", None, tokens["access"])
+
+
+def run_load(port, call, duration, concurrency):
+    """keep-alive clients hammering one endpoint, returns (ok, failed)"""
+    counts = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        ok = failed = 0
+
+        while time.monotonic() < deadline:
+            status, _ = request(connection, *call)
+
+            if status == 200:
+                ok += 1
+            else:
+                failed += 1
+
+        connection.close()
+
+        with lock:
+            counts["ok"] += ok
+            counts["failed"] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return counts["ok"], counts["failed"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=ENDPOINTS,
+        default=list(ENDPOINTS)
+    )
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        setup_database(os.path.join(directory, "db.sqlite3"))
+        results = {}
+
+        for stack, use_async in (("sync", False), ("async", True)):
+            server = start_server(args.port, use_async)
+
+            try:
+                tokens = login(args.port)
+
+                for endpoint in args.endpoints:
+                    ok, failed = run_load(
+                        args.port,
+                        make_call(endpoint, tokens),
+                        args.duration,
+                        args.concurrency
+                    )
+                    results[stack, endpoint] = (ok / args.duration, failed)
+            finally:
+                server.terminate()
+                server.wait()
+
+        print(f"{'endpoint':<10}{'sync req/s':>14}{'async req/s':>14}"
+              f"{'failed':>10}")
+
+        for endpoint in args.endpoints:
+            sync_rate, sync_failed = results["sync", endpoint]
+            async_rate, async_failed = results["async", endpoint]
+            print(f"{endpoint:<10}{sync_rate:>14.1f}{async_rate:>14.1f}"
+                  f"{sync_failed + async_failed:>10}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compare the per request overhead of the full and the api middleware chains.
+
+    python -m benchmarks.middleware --requests 5000
+
+Requests go straight to two WSGIHandlers, one built with API_MIDDLEWARE
+disabled and one with it enabled, in the same process with
+benchmarks.settings, so the difference is the middleware alone. The
+database is a fresh sqlite file in a temporary directory.
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.asgi import EMAIL, setup_database
+
+
+def make_environ(path, token=None):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "127.0.0.1",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+    }
+
+    if token:
+        environ["HTTP_AUTHORIZATION"] = f"Token {token}"
+
+    return environ
+
+
+def time_requests(application, path, token, requests):
+    """microseconds per request"""
+    statuses = set()
+
+    def start_response(status, headers):
+        statuses.add(status)
+
+    started = time.perf_counter()
+
+    for _ in range(requests):
+        response = application(make_environ(path, token), start_response)
+        b"".join(response)
+        response.close()
+
+    elapsed = time.perf_counter() - started
+
+    return elapsed / requests * 1e6, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        setup_database(os.path.join(directory, "db.sqlite3"))
+
+        from django.contrib.auth import get_user_model
+        from django.conf import settings
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.test import override_settings
+        from authentication.helper import get_user_tokens
+
+        token = get_user_tokens(
+            get_user_model().objects.get(email=EMAIL)
+        )["access_token"]
+
+        with override_settings(
+            API_MIDDLEWARE={**settings.API_MIDDLEWARE, "ENABLED": False}
+        ):
+            full = WSGIHandler()
+
+        applications = {"full": full, "api": WSGIHandler()}
+        calls = {
+            "profile": ("/api/profile/", token),
+            "not found": ("/api/missing/", None),
+        }
+
+        print(f"{'endpoint':<12}{'full us/req':>14}{'api us/req':>14}"
+              f"{'saved':>10}")
+
+        for name, (path, token) in calls.items():
+            best = {}
+
+            """warm up, then keep the fastest round of each chain"""
+            for application in applications.values():
+                time_requests(application, path, token, 100)
+
+            for _ in range(args.rounds):
+                for chain, application in applications.items():
+                    cost, statuses = time_requests(
+                        application,
+                        path,
+                        token,
+                        args.requests
+                    )
+                    best[chain] = min(best.get(chain, cost), cost)
+
+            print(f"{name:<12}{best['full']:>14.1f}{best['api']:>14.1f}"
+                  f"{1 - best['api'] / best['full']:>10.1%}"
+                  f"  {', '.join(sorted(statuses))}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
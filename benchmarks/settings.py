@@ -0,0 +1,42 @@
+"""settings of the servers started by benchmarks/asgi.py"""
+import os
+from boilerplate.settings import *  # noqa: F401,F403
+from boilerplate.settings import (
+    DELIVERY,
+    PASSWORD_HASHING,
+    REST_FRAMEWORK,
+    SIMPLE_JWT
+)
+
+ASYNC_API = os.environ.get("BENCHMARK_ASYNC_API") == "1"
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["BENCHMARK_DB"],
+        "OPTIONS": {"timeout": 30},
+    }
+}
+
+# measure the framework, not the throttles or the password hashing
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_RATES": {
+        scope: "1000000/minute"
+        for scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+    },
+}
+
+PASSWORD_HASHING = {**PASSWORD_HASHING, "ITERATIONS": 1000}
+
+# the same refresh token is sent over and over
+SIMPLE_JWT = {**SIMPLE_JWT, "ROTATE_REFRESH_TOKENS": False}
+
+DELIVERY = {
+    **DELIVERY,
+    "BACKEND": "core.delivery.FileBackend",
+    "OPTIONS": {"path": os.devnull},
+}
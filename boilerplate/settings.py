@@ -40,14 +40,24 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.CsrfViewMiddleware",
+    "core.middleware.AuthenticationMiddleware",
+    "core.middleware.MessageMiddleware",
+    "core.middleware.XFrameOptionsMiddleware",
 ]
 
+# The core.middleware classes are the django ones, bypassed for requests
+# under PREFIX. The api views authenticate with jwts and are csrf exempt,
+# so they skip sessions, csrf, auth, messages and clickjacking. Paths under
+# EXCLUDE, the html docs, and everything else run the whole chain.
+API_MIDDLEWARE = {
+    "ENABLED": True,
+    "PREFIX": "/api/",
+    "EXCLUDE": ["/api/docs/"],
+}
+
 ROOT_URLCONF = "boilerplate.urls"
 
 TEMPLATES = [
@@ -80,6 +90,28 @@ DATABASES = {
 }
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    "authentication.hashing.CalibratedPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+PASSWORD_HASHING = {
+    # worker processes used to hash and verify passwords, 0 runs them on the
+    # request thread
+    "WORKERS": 0,
+    # pbkdf2 iterations, None keeps django's default. Run calibratehasher to
+    # pick a value for this machine. Existing hashes with fewer iterations
+    # are upgraded on login, hashes with more are kept.
+    "ITERATIONS": None,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -121,6 +153,27 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Counters of authentication.throttling.SlidingWindowScopedThrottle.
+    # The sqlite file is shared by the worker processes of one host, point
+    # this at redis or memcached when running on several hosts.
+    "throttle": {
+        "BACKEND": "core.cache.SQLiteCache",
+        "LOCATION": BASE_DIR / "throttle.sqlite3",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+    # Locks of core.scheduler, must be shared by the processes running it.
+    "scheduler": {
+        "BACKEND": "core.cache.SQLiteCache",
+        "LOCATION": BASE_DIR / "scheduler.sqlite3",
+    },
+}
+
+THROTTLE_CACHE = "throttle"
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_RATES": {
@@ -142,18 +195,30 @@ SPECTACULAR_SETTINGS = {
 }
 
 
+# /api/docs/schema serves the schema from memory, rendered once instead of
+# on every request. It is built when the app server starts with
+# BUILD_ON_STARTUP, on first request otherwise. With FILE set it is loaded
+# from that file, written at build time with the buildschema command.
+OPENAPI_SCHEMA = {
+    "BUILD_ON_STARTUP": True,
+    "FILE": None,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # last_login is written by the LAST_LOGIN recorder
+    "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS512",
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Token",),
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION",
     "USER_ID_FIELD": "id",
     "USER_ID_CLAIM": "user",
+    "TOKEN_OBTAIN_SERIALIZER": "authentication.serializer.UserTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "authentication.serializer.UserTokenRefreshSerializer",
     # custom
     'AUTH_COOKIE': 'access',
     # Cookie name. Enables cookies if value is set.
@@ -166,11 +231,161 @@ SIMPLE_JWT = {
     'AUTH_COOKIE_HTTP_ONLY': True,
     'AUTH_COOKIE_PATH': '/',
     'AUTH_COOKIE_SAMESITE': "None",  # TODO: Modify to Lax
+    # Embed email, is_active, is_admin, is_superuser and full_name in the
+    # tokens so authentication.authenticate.StatelessAuthentication can
+    # authorize requests without a database lookup.
+    'EMBED_USER_CLAIMS': False,
+    # Check refresh tokens against an in memory index of blacklisted jtis
+    # instead of querying BlacklistedToken on every refresh. Tokens
+    # blacklisted by other workers are picked up after the sync interval.
+    'REVOCATION_INDEX': True,
+    # seconds
+    'REVOCATION_INDEX_SYNC_INTERVAL': 1,
+    # seconds, tokens blacklisted this recently are read again on every
+    # sync so a transaction committing late is not skipped. Must exceed
+    # the longest transaction blacklisting tokens.
+    'REVOCATION_INDEX_SYNC_OVERLAP': 10,
+    # Track each login session as one TokenFamily row rotated in place
+    # instead of an OutstandingToken and a BlacklistedToken row per refresh.
+    # Replaying an older refresh token revokes the whole session. Refresh
+    # tokens issued before this was enabled are rejected, their users log
+    # in again.
+    'REFRESH_TOKEN_FAMILIES': False,
 }
 
 AUTH_USER_MODEL = "authentication.User"
 
 
+# Serve login, refresh, register, verify, the forgot password endpoints and
+# the profile with async views when running under asgi. They are plain
+# django views and are left out of the generated schema.
+ASYNC_API = False
+
+
+# Users resolved from jwt claims are cached between requests. Saving or
+# deleting a user drops its entry once the transaction commits.
+# With BACKEND None the entries are per process and only the process making
+# the change drops its copy. Other workers keep serving the old user, with
+# its old is_active, is_admin and permissions, for up to TTL seconds, so
+# role changes do not apply right away across workers. Set BACKEND to a
+# cache alias shared by all the workers (redis, memcached) for that.
+USER_CACHE = {
+    "ENABLED": True,
+    "MAX_SIZE": 1024,
+    # seconds
+    "TTL": 30,
+    # evict least recently used entries first, otherwise oldest first
+    "LRU": True,
+    "BACKEND": None,
+}
+
+
+# Activation links carry the user id and a timestamped hmac instead of a
+# Tokens row, so registration writes no token and verification is a primary
+# key lookup plus one update. deleteexpiredtokens has nothing to clean up
+# in this mode. Links expire after PASSWORD_RESET_TIMEOUT.
+SIGNED_ACTIVATION_TOKENS = False
+
+
+# Register users without the SELECTs of the email and phone unique
+# validators. The insert runs in a savepoint and a unique constraint
+# violation is returned as the same field error. Only the first violated
+# field is reported, after the other fields validated.
+REGISTRATION_FAST_PATH = False
+
+
+# Where forgot password otps live. authentication.otp.CacheOtpStore keeps
+# a hash of the otp in a cache instead, expiring it through the cache
+# timeout, e.g. {"BACKEND": "authentication.otp.CacheOtpStore",
+# "OPTIONS": {"cache": "default"}}. Use a shared cache with several workers.
+OTP_STORE = {
+    "BACKEND": "authentication.otp.ModelOtpStore",
+    "OPTIONS": {},
+}
+
+
+# Write user_created/otp_created to the authentication Outbox table in the
+# same transaction as the user/otp instead of sending them right away.
+# Entries are published by a background thread after commit and by the
+# drainoutbox command. An entry failing to publish is retried after
+# RETRY_BACKOFF seconds, doubled after every attempt, up to MAX_ATTEMPTS.
+# The delete_outbox_entries job deletes entries published, or given up,
+# more than RETENTION seconds ago, they hold otps and activation tokens.
+OUTBOX = {
+    "ENABLED": False,
+    "DRAIN_IN_PROCESS": True,
+    "BATCH_SIZE": 100,
+    # seconds between background drains when nothing wakes the drainer
+    "POLL_INTERVAL": 5,
+    "MAX_ATTEMPTS": 10,
+    "RETRY_BACKOFF": 5,
+    "RETENTION": 86400,
+}
+
+
+# Maintenance jobs run by core.scheduler, FUNC returns the rows affected.
+# With ENABLED every app server process started through boilerplate.wsgi or
+# boilerplate.asgi runs a scheduler thread, otherwise run the runscheduler
+# command. Other management commands and tests never run the jobs. A job
+# runs once per INTERVAL (seconds) across all processes sharing the CACHE
+# alias, the next run is delayed by up to JITTER seconds.
+SCHEDULER = {
+    "ENABLED": False,
+    "CACHE": "scheduler",
+    "JOBS": {
+        "delete_expired_otps": {
+            "FUNC": "authentication.jobs.delete_expired_otps",
+            "INTERVAL": 300,
+            "JITTER": 30,
+        },
+        "delete_used_tokens": {
+            "FUNC": "authentication.jobs.delete_used_tokens",
+            "INTERVAL": 3600,
+            "JITTER": 300,
+        },
+        "delete_expired_refresh_tokens": {
+            "FUNC": "authentication.jobs.delete_expired_refresh_tokens",
+            "INTERVAL": 3600,
+            "JITTER": 300,
+        },
+        "delete_outbox_entries": {
+            "FUNC": "authentication.jobs.delete_outbox_entries",
+            "INTERVAL": 3600,
+            "JITTER": 300,
+        },
+    },
+}
+
+
+# Logins buffer last_login per user in memory, a background thread writes
+# the buffer with one UPDATE per BATCH_SIZE users every FLUSH_INTERVAL
+# seconds, earlier once MAX_PENDING users are buffered, and on exit.
+# last_login lags by up to FLUSH_INTERVAL. The thread is started by the
+# app server (wsgi.py/asgi.py), logins in any other process like the test
+# runner write last_login right away. Turn BUFFERED off and
+# SIMPLE_JWT["UPDATE_LAST_LOGIN"] on to write it on every login instead.
+LAST_LOGIN = {
+    "BUFFERED": True,
+    "FLUSH_INTERVAL": 5,
+    "MAX_PENDING": 10000,
+    "BATCH_SIZE": 500,
+}
+
+
+# Notifications for user_created/otp_created are queued and delivered by
+# worker threads. core.delivery.FileBackend takes {"path": ...} as OPTIONS.
+DELIVERY = {
+    "BACKEND": "core.delivery.ConsoleBackend",
+    "OPTIONS": {},
+    "MAX_QUEUE_SIZE": 1000,
+    "WORKERS": 2,
+    "BATCH_SIZE": 50,
+    "MAX_RETRIES": 3,
+    # seconds, doubled after every failed attempt
+    "RETRY_BACKOFF": 0.5,
+}
+
+
 # CORS setup
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000"
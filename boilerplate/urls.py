@@ -1,11 +1,17 @@
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from core.views import root
+from drf_spectacular.views import SpectacularSwaggerView
+from core.schema import schema_view
+from core.views import root, DeliveryStatsView
 
 urlpatterns = [
     path("", root, name="home"),
     path("api/docs/", SpectacularSwaggerView.as_view(), name="swagger"),
-    path("api/docs/schema", SpectacularAPIView.as_view(), name="schema"),
+    path("api/docs/schema", schema_view, name="schema"),
     path("api/auth/", include("authentication.urls")),
     path("api/profile/", include("userprofile.urls")),
+    path(
+        "api/status/delivery/",
+        DeliveryStatsView.as_view(),
+        name="delivery-stats"
+    ),
 ]
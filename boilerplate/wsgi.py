@@ -9,8 +9,25 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'boilerplate.settings')
 
 application = get_wsgi_application()
+
+if settings.OPENAPI_SCHEMA["BUILD_ON_STARTUP"]:
+    # render the schema before the first request asks for it
+    from core.schema import openapi_schema
+    openapi_schema.get('yaml')
+
+if settings.SCHEDULER["ENABLED"]:
+    # run the maintenance jobs in the app server, not in every process
+    # loading the apps like migrate, shell or the test runner
+    from core.scheduler import scheduler
+    scheduler.start()
+
+if settings.LAST_LOGIN["BUFFERED"]:
+    # buffer last_login in the app server, other processes write it through
+    from authentication.last_login import last_login_recorder
+    last_login_recorder.start()
@@ -0,0 +1,169 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
+from django.http import Http404, JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of the drf APIView.
+
+    Authentication, permissions and throttling are configured with the same
+    class attributes and the same drf classes. Authenticators are awaited
+    through aauthenticate() when they provide it, throttles through
+    aallow_request(), anything else runs in a worker thread. Handlers get
+    the body parsed by parser_classes as self.data and return
+    self.response(...).
+    """
+
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = []
+    serializer_class = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """authentication is token based, like the drf views"""
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = None
+
+        if method in self.http_method_names:
+            handler = getattr(self, method, None)
+
+        try:
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+
+            self.data = self.parse(request)
+            await self.perform_authentication(request)
+            self.check_permissions(request)
+            await self.check_throttles(request)
+
+            return await handler(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    def parse(self, request):
+        """the body parsed by parser_classes, like request.data of drf"""
+        return Request(request, parsers=self.get_parsers()).data
+
+    async def perform_authentication(self, request):
+        request.user, request.auth = AnonymousUser(), None
+
+        for authenticator in self.get_authenticators():
+            if hasattr(authenticator, "aauthenticate"):
+                user_auth = await authenticator.aauthenticate(request)
+            else:
+                user_auth = await sync_to_async(authenticator.authenticate)(
+                    request
+                )
+
+            if user_auth is not None:
+                request.user, request.auth = user_auth
+                return
+
+    def check_permissions(self, request):
+        for permission in self.get_permissions():
+            if not permission.has_permission(request, self):
+                if request.auth is None and self.authentication_classes:
+                    raise exceptions.NotAuthenticated()
+
+                raise exceptions.PermissionDenied(
+                    getattr(permission, "message", None)
+                )
+
+    async def check_throttles(self, request):
+        waits = []
+
+        for throttle in self.get_throttles():
+            if hasattr(throttle, "aallow_request"):
+                allowed = await throttle.aallow_request(request, self)
+            else:
+                allowed = await sync_to_async(throttle.allow_request)(
+                    request,
+                    self
+                )
+
+            if not allowed:
+                waits.append(throttle.wait())
+
+        if waits:
+            waits = [wait for wait in waits if wait is not None]
+            raise exceptions.Throttled(max(waits, default=None))
+
+    def get_parsers(self):
+        return [parser() for parser in self.parser_classes]
+
+    def get_authenticators(self):
+        return [auth() for auth in self.authentication_classes]
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    def get_throttles(self):
+        return [throttle() for throttle in self.throttle_classes]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("context", {"request": self.request, "view": self})
+        return self.serializer_class(*args, **kwargs)
+
+    def response(self, data=None, status=status.HTTP_200_OK):
+        return JsonResponse(
+            data,
+            status=status,
+            encoder=JSONEncoder,
+            safe=False,
+            json_dumps_params={"separators": (",", ":")}
+        )
+
+    def handle_exception(self, exc):
+        """same status codes and bodies as the drf exception handler"""
+        if isinstance(exc, TokenError):
+            exc = InvalidToken(exc.args[0])
+        elif isinstance(exc, Http404):
+            exc = exceptions.NotFound(*exc.args)
+        elif isinstance(exc, DjangoPermissionDenied):
+            exc = exceptions.PermissionDenied(*exc.args)
+
+        if not isinstance(exc, exceptions.APIException):
+            raise exc
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {"detail": exc.detail}
+
+        res = self.response(data, status=exc.status_code)
+
+        if isinstance(exc, (
+            exceptions.NotAuthenticated,
+            exceptions.AuthenticationFailed
+        )):
+            header = self.get_authenticate_header(self.request)
+
+            if header:
+                res["WWW-Authenticate"] = header
+            else:
+                res.status_code = status.HTTP_403_FORBIDDEN
+
+        if getattr(exc, "wait", None):
+            res["Retry-After"] = "%d" % exc.wait
+
+        return res
+
+    def get_authenticate_header(self, request):
+        authenticators = self.get_authenticators()
+
+        if authenticators:
+            return authenticators[0].authenticate_header(request)
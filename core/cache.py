@@ -0,0 +1,168 @@
+import pickle
+import sqlite3
+import threading
+import time
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache stored in a sqlite file shared by every process of the host.
+
+    incr() is a single UPDATE so counters stay exact across worker
+    processes, which the throttles rely on. Meant for development, tests and
+    single host deployments, use redis or memcached across hosts.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = str(location)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        """one autocommit connection per thread"""
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(
+                self.location,
+                timeout=30,
+                isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value, expires REAL)"
+            )
+            self._local.connection = connection
+
+        return connection
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._cull()
+
+        """an expired row counts as missing and is replaced"""
+        cursor = self.connection.execute(
+            "INSERT INTO cache VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE "
+            "SET value = excluded.value, expires = excluded.expires "
+            "WHERE cache.expires <= ?",
+            (
+                key,
+                self._encode(value),
+                self.get_backend_timeout(timeout),
+                time.time()
+            )
+        )
+
+        return cursor.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self.connection.execute(
+            "SELECT value FROM cache WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (key, time.time())
+        ).fetchone()
+
+        if row is None:
+            return default
+
+        return self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._cull()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+            (key, self._encode(value), self.get_backend_timeout(timeout))
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.connection.execute(
+            "UPDATE cache SET expires = ? WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self.connection.execute(
+            "DELETE FROM cache WHERE key = ?",
+            (key,)
+        )
+
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self.connection.execute(
+            "SELECT 1 FROM cache WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (key, time.time())
+        ).fetchone()
+
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self.connection.execute(
+            "UPDATE cache SET value = value + ? WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?) "
+            "AND typeof(value) = 'integer' RETURNING value",
+            (delta, key, time.time())
+        ).fetchone()
+
+        if row is None:
+            raise ValueError("Key '%s' not found" % key)
+
+        return row[0]
+
+    def clear(self):
+        self.connection.execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        """connections are kept for the life of the thread"""
+
+    def _cull(self):
+        count, = self.connection.execute(
+            "SELECT COUNT(*) FROM cache"
+        ).fetchone()
+
+        if count < self._max_entries:
+            return
+
+        count -= self.connection.execute(
+            "DELETE FROM cache WHERE expires <= ?",
+            (time.time(),)
+        ).rowcount
+
+        if count < self._max_entries:
+            return
+
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+
+        self.connection.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+            "ORDER BY expires IS NULL, expires LIMIT ?)",
+            (count // self._cull_frequency,)
+        )
+
+    def _encode(self, value):
+        """integers are stored as is so incr() can add to them in sql"""
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, value):
+        if isinstance(value, int):
+            return value
+
+        return pickle.loads(value)
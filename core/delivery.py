@@ -0,0 +1,203 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConsoleBackend:
+    """write every message as a json line to stdout"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            sys.stdout.write(json.dumps(message) + "\n")
+
+        sys.stdout.flush()
+
+
+class FileBackend:
+    """append every message as a json line to a file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send_messages(self, messages):
+        with open(self.path, "a") as file:
+            for message in messages:
+                file.write(json.dumps(message) + "\n")
+
+
+class DeliveryQueue:
+    """
+    Bounded queue drained by a pool of worker threads.
+
+    Workers pick up to batch_size messages at a time and hand them to the
+    backend, retrying failed batches with exponential backoff. Enqueueing
+    never blocks, when the queue is full the message is dropped and counted.
+    """
+
+    def __init__(self, backend, max_size=1000, workers=2, batch_size=50,
+                 max_retries=3, retry_backoff=0.5):
+        self.backend = backend
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "delivered": 0,
+            "failed": 0,
+            "dropped": 0,
+            "retries": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls):
+        """build the queue from the DELIVERY setting"""
+        options = settings.DELIVERY
+        backend = import_string(options["BACKEND"])(**options["OPTIONS"])
+        return cls(
+            backend,
+            max_size=options["MAX_QUEUE_SIZE"],
+            workers=options["WORKERS"],
+            batch_size=options["BATCH_SIZE"],
+            max_retries=options["MAX_RETRIES"],
+            retry_backoff=options["RETRY_BACKOFF"],
+        )
+
+    def enqueue(self, kind, **payload):
+        """queue a message for delivery, returns False when it was dropped"""
+        self.start()
+
+        message = {"kind": kind, "payload": payload}
+
+        try:
+            self._queue.put_nowait((time.monotonic(), message))
+        except queue.Full:
+            logger.warning("delivery queue full, dropping %s message", kind)
+            self._count("dropped")
+            return False
+
+        self._count("enqueued")
+        return True
+
+    def start(self):
+        """start the workers on first use"""
+        if self._threads:
+            return
+
+        with self._lock:
+            if self._threads:
+                return
+
+            for number in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"delivery-{number}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        """deliver what is queued and stop the workers"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+
+        for _ in threads:
+            self._queue.put((None, None))
+
+        deadline = time.monotonic() + timeout
+
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+
+        latency_total = stats.pop("latency_total")
+        stats["depth"] = self._queue.qsize()
+        stats["latency_avg"] = (
+            latency_total / stats["delivered"] if stats["delivered"] else 0.0
+        )
+
+        return stats
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def _work(self):
+        while True:
+            batch = []
+            stop = False
+            item = self._queue.get()
+
+            while True:
+                if item[1] is None:
+                    """each worker takes exactly one stop marker"""
+                    stop = True
+                    break
+
+                batch.append(item)
+
+                if len(batch) >= self.batch_size:
+                    break
+
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._deliver(batch)
+
+            if stop:
+                return
+
+    def _deliver(self, batch):
+        messages = [message for _, message in batch]
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.backend.send_messages(messages)
+                break
+            except Exception:
+                if attempt == self.max_retries:
+                    logger.exception(
+                        "delivery of %s messages failed", len(messages)
+                    )
+                    self._count("failed", len(messages))
+                    return
+
+                self._count("retries")
+                time.sleep(self.retry_backoff * 2 ** attempt)
+
+        now = time.monotonic()
+        latencies = [now - enqueued_at for enqueued_at, _ in batch]
+
+        with self._lock:
+            self._stats["delivered"] += len(batch)
+            self._stats["latency_total"] += sum(latencies)
+            self._stats["latency_max"] = max(
+                self._stats["latency_max"],
+                *latencies
+            )
+
+
+delivery_queue = DeliveryQueue.from_settings()
+atexit.register(delivery_queue.stop)
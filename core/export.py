@@ -0,0 +1,25 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Echo:
+    """file-like object handing back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(fields, rows):
+    """yield a header line and one csv line per row"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(fields, rows):
+    """yield one json object per row and line"""
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
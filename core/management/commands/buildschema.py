@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.schema import SchemaCache
+
+
+class Command(BaseCommand):
+    help = "write the openapi schema served by /api/docs/schema to a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=settings.OPENAPI_SCHEMA["FILE"],
+            help='defaults to OPENAPI_SCHEMA["FILE"]'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['yaml', 'json'],
+            default='yaml'
+        )
+
+    def handle(self, *args, **options):
+        """entry point of the command"""
+        try:
+            if not options['file']:
+                raise ValueError('Pass --file or set OPENAPI_SCHEMA["FILE"]')
+
+            """always generated, never loaded from the file being written"""
+            document = SchemaCache().get(options['format'])
+
+            with open(options['file'], 'wb') as schema_file:
+                schema_file.write(document.body)
+
+            self.stdout.write(
+                f'Wrote {len(document.body)} bytes to {options["file"]}'
+            )
+            self.stdout.write(self.style.SUCCESS('Complete'))
+        except Exception as e:
+            self.stderr.write(str(e))
@@ -0,0 +1,43 @@
+from core.scheduler import Scheduler
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "run the maintenance jobs of the SCHEDULER setting"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='run every job right away and exit'
+        )
+
+    def handle(self, *args, **options):
+        """entry point of the command"""
+        try:
+            scheduler = Scheduler.from_settings()
+
+            if not options['once']:
+                self.stdout.write('Running scheduled jobs')
+                scheduler.run()
+                return
+
+            for job in scheduler.jobs.values():
+                scheduler.run_job(job)
+                stats = job.stats()
+
+                if stats['skipped']:
+                    self.stdout.write(f'{job.name} is locked by another run')
+                elif stats['failed']:
+                    self.stdout.write(f'{job.name} failed')
+                else:
+                    self.stdout.write(
+                        f'{job.name} affected {stats["last_rows"]} rows '
+                        f'in {stats["last_duration"]:.3f}s'
+                    )
+
+            self.stdout.write(self.style.SUCCESS('Complete'))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
+        except Exception as e:
+            self.stderr.write(str(e))
@@ -0,0 +1,105 @@
+"""
+Middleware the api paths bypass.
+
+The api views authenticate with jwts and are csrf exempt, so requests under
+API_MIDDLEWARE["PREFIX"] skip the session, csrf, auth, messages and
+clickjacking middleware. Each class here subclasses the django middleware
+it wraps, so MIDDLEWARE lists it in the same place and the admin checks
+still find it.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class APIBypassMixin:
+    """send api requests straight to the next middleware"""
+
+    def __init__(self, get_response):
+        config = settings.API_MIDDLEWARE
+        self.next_response = get_response
+        self.prefix = config["PREFIX"] if config["ENABLED"] else None
+        self.exclude = tuple(config["EXCLUDE"])
+        super().__init__(get_response)
+
+    def bypass(self, request):
+        path = request.path_info
+        return (
+            self.prefix is not None
+            and path.startswith(self.prefix)
+            and not path.startswith(self.exclude)
+        )
+
+    def __call__(self, request):
+        if self.bypass(request):
+            return self.next_response(request)
+
+        return super().__call__(request)
+
+
+class ViewBypassMixin:
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.bypass(request):
+            return None
+
+        return super().process_view(
+            request,
+            view_func,
+            view_args,
+            view_kwargs
+        )
+
+
+class TemplateResponseBypassMixin:
+    def process_template_response(self, request, response):
+        if self.bypass(request):
+            return response
+
+        return super().process_template_response(request, response)
+
+
+class ExceptionBypassMixin:
+    def process_exception(self, request, exception):
+        if self.bypass(request):
+            return None
+
+        return super().process_exception(request, exception)
+
+
+HOOK_MIXINS = {
+    "process_view": ViewBypassMixin,
+    "process_template_response": TemplateResponseBypassMixin,
+    "process_exception": ExceptionBypassMixin,
+}
+
+
+def bypass_api(middleware_path):
+    """
+    The middleware at middleware_path, skipped on api paths. Its hooks are
+    only overridden when it has them, django registers every one it finds.
+    """
+    middleware = import_string(middleware_path)
+    hooks = [
+        mixin for hook, mixin in HOOK_MIXINS.items()
+        if hasattr(middleware, hook)
+    ]
+
+    return type(
+        middleware.__name__,
+        (APIBypassMixin, *hooks, middleware),
+        {"__module__": __name__}
+    )
+
+
+SessionMiddleware = bypass_api(
+    "django.contrib.sessions.middleware.SessionMiddleware"
+)
+CsrfViewMiddleware = bypass_api("django.middleware.csrf.CsrfViewMiddleware")
+AuthenticationMiddleware = bypass_api(
+    "django.contrib.auth.middleware.AuthenticationMiddleware"
+)
+MessageMiddleware = bypass_api(
+    "django.contrib.messages.middleware.MessageMiddleware"
+)
+XFrameOptionsMiddleware = bypass_api(
+    "django.middleware.clickjacking.XFrameOptionsMiddleware"
+)
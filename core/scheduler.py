@@ -0,0 +1,172 @@
+import logging
+import random
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """a maintenance function returning the number of rows it touched"""
+
+    def __init__(self, name, func, interval, jitter=0):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+
+        self.next_run = None
+        self.runs = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_rows = None
+
+    def schedule(self, now):
+        self.next_run = now + self.interval + random.uniform(0, self.jitter)
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "last_run": self.last_run,
+            "last_duration": self.last_duration,
+            "last_rows": self.last_rows,
+        }
+
+
+class Scheduler:
+    """
+    Run the jobs of the SCHEDULER setting on their interval.
+
+    Before running a job the scheduler adds a lock key to a shared cache
+    that expires after the job interval. Only the process that added it
+    runs the job, the others skip that round, so a job runs once per
+    interval however many workers run a scheduler.
+    """
+
+    key_prefix = "scheduler"
+
+    def __init__(self, jobs=(), cache="default"):
+        self.jobs = {job.name: job for job in jobs}
+        self.cache = cache
+
+        self._owner = uuid.uuid4().hex
+        self._event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = settings.SCHEDULER
+        return cls(
+            jobs=[
+                Job(
+                    name,
+                    import_string(job["FUNC"]),
+                    job["INTERVAL"],
+                    job.get("JITTER", 0)
+                )
+                for name, job in options["JOBS"].items()
+            ],
+            cache=options["CACHE"],
+        )
+
+    def make_key(self, job):
+        return f"{self.key_prefix}:{job.name}"
+
+    def run_pending(self, now=None):
+        """run the jobs that are due, returns the seconds until the next"""
+        if not self.jobs:
+            return None
+
+        now = time.monotonic() if now is None else now
+
+        for job in self.jobs.values():
+            if job.next_run is None:
+                """short lived management commands never get to run jobs"""
+                job.schedule(now)
+
+            if job.next_run <= now:
+                self.run_job(job)
+                job.schedule(now)
+
+        return max(
+            min(job.next_run for job in self.jobs.values()) - now,
+            0
+        )
+
+    def run_job(self, job):
+        try:
+            locked = caches[self.cache].add(
+                self.make_key(job),
+                self._owner,
+                timeout=job.interval
+            )
+        except Exception:
+            job.failed += 1
+            logger.exception("locking scheduled job %s failed", job.name)
+            return
+
+        if not locked:
+            job.skipped += 1
+            return
+
+        started = time.monotonic()
+
+        try:
+            rows = job.func()
+        except Exception:
+            job.failed += 1
+            logger.exception("scheduled job %s failed", job.name)
+            return
+        finally:
+            job.runs += 1
+            job.last_run = time.time()
+            job.last_duration = time.monotonic() - started
+            close_old_connections()
+
+        job.last_rows = rows
+        logger.info(
+            "scheduled job %s affected %s rows in %.3fs",
+            job.name,
+            rows,
+            job.last_duration
+        )
+
+    def stats(self):
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+    def start(self):
+        if self._thread or not self.jobs:
+            return
+
+        with self._lock:
+            if self._thread:
+                return
+
+            self._thread = threading.Thread(
+                target=self.run,
+                name="scheduler",
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._event.set()
+
+    def run(self):
+        """run jobs until stop() is called"""
+        while not self._event.is_set():
+            self._event.wait(self.run_pending())
+
+
+scheduler = Scheduler.from_settings()
@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import threading
+import yaml
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+
+class Document:
+    """one encoding of the schema, with its gzip variant and their etags"""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.etag = self.make_etag(body)
+
+        """mtime is fixed so the same schema always compresses the same"""
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.gzipped_etag = self.make_etag(self.gzipped)
+
+    @staticmethod
+    def make_etag(body):
+        return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+class SchemaCache:
+    """
+    The OpenAPI schema rendered once and kept in memory.
+
+    The schema is generated on first use, or loaded from the file of the
+    OPENAPI_SCHEMA setting when one is configured, and rendered as yaml and
+    json up front. Requests only pick one of the prebuilt documents.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+
+        self._documents = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(path=settings.OPENAPI_SCHEMA["FILE"])
+
+    def generate(self):
+        """introspect the views like SpectacularAPIView does"""
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+            urlconf=spectacular_settings.SERVE_URLCONF
+        )
+        return generator.get_schema(
+            request=None,
+            public=spectacular_settings.SERVE_PUBLIC
+        )
+
+    def load(self):
+        """the schema file is yaml, which includes json"""
+        with open(self.path, 'rb') as schema_file:
+            return yaml.safe_load(schema_file)
+
+    def build(self):
+        schema = self.load() if self.path else self.generate()
+        return {
+            'yaml': Document(
+                OpenApiYamlRenderer().render(schema),
+                OpenApiYamlRenderer.media_type
+            ),
+            'json': Document(
+                OpenApiJsonRenderer().render(schema),
+                OpenApiJsonRenderer.media_type
+            ),
+        }
+
+    def get(self, kind):
+        if self._documents is None:
+            with self._lock:
+                if self._documents is None:
+                    self._documents = self.build()
+
+        return self._documents[kind]
+
+    def clear(self):
+        with self._lock:
+            self._documents = None
+
+
+openapi_schema = SchemaCache.from_settings()
+
+
+def negotiate(request):
+    """yaml like SpectacularAPIView, unless ?format= or Accept ask for json"""
+    kind = request.GET.get('format')
+
+    if kind in ('yaml', 'json'):
+        return kind
+
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+def accepts_gzip(request):
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+
+@require_safe
+def schema_view(request):
+    """serve the cached schema, honouring If-None-Match"""
+    document = openapi_schema.get(negotiate(request))
+    gzipped = accepts_gzip(request)
+
+    if gzipped:
+        body, etag = document.gzipped, document.gzipped_etag
+    else:
+        body, etag = document.body, document.etag
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        res = HttpResponseNotModified()
+    else:
+        res = HttpResponse(body, content_type=document.content_type)
+
+        if gzipped:
+            res['Content-Encoding'] = 'gzip'
+
+    res['ETag'] = etag
+    res['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(res, ('Accept', 'Accept-Encoding'))
+
+    return res
@@ -0,0 +1,94 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.serializers import as_serializer_error
+
+
+class AsyncSerializerMixin:
+    """
+    Validate and save from async views.
+
+    Field validation is plain python and runs on the event loop unless the
+    serializer sets field_validation_in_thread, e.g. for the database backed
+    unique validators of a model serializer. validate() is awaited through
+    avalidate(), which serializers override with async orm calls.
+    """
+
+    field_validation_in_thread = False
+
+    async def ais_valid(self, raise_exception=False):
+        if not hasattr(self, '_validated_data'):
+            try:
+                self._validated_data = await self.arun_validation(
+                    self.initial_data
+                )
+            except serializers.ValidationError as exc:
+                self._validated_data = {}
+                self._errors = exc.detail
+            else:
+                self._errors = {}
+
+        if self._errors and raise_exception:
+            raise serializers.ValidationError(self.errors)
+
+        return not bool(self._errors)
+
+    async def arun_validation(self, data):
+        (is_empty_value, data) = self.validate_empty_values(data)
+
+        if is_empty_value:
+            return data
+
+        if self.field_validation_in_thread:
+            value = await sync_to_async(self.run_field_validation)(data)
+        else:
+            value = self.run_field_validation(data)
+
+        try:
+            return await self.avalidate(value)
+        except (serializers.ValidationError, DjangoValidationError) as exc:
+            raise serializers.ValidationError(
+                detail=as_serializer_error(exc)
+            )
+
+    def run_field_validation(self, data):
+        value = self.to_internal_value(data)
+
+        try:
+            self.run_validators(value)
+        except (serializers.ValidationError, DjangoValidationError) as exc:
+            raise serializers.ValidationError(
+                detail=as_serializer_error(exc)
+            )
+
+        return value
+
+    async def avalidate(self, attrs):
+        return await sync_to_async(self.validate)(attrs)
+
+    async def asave(self, **kwargs):
+        validated_data = {**self.validated_data, **kwargs}
+
+        if self.instance is not None:
+            self.instance = await self.aupdate(self.instance, validated_data)
+        else:
+            self.instance = await self.acreate(validated_data)
+
+        return self.instance
+
+    async def acreate(self, validated_data):
+        return await sync_to_async(self.create)(validated_data)
+
+    async def aupdate(self, instance, validated_data):
+        return await sync_to_async(self.update)(instance, validated_data)
+
+
+class DeliveryStatsSerializer(serializers.Serializer):
+    depth = serializers.IntegerField()
+    enqueued = serializers.IntegerField()
+    delivered = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    dropped = serializers.IntegerField()
+    retries = serializers.IntegerField()
+    latency_avg = serializers.FloatField()
+    latency_max = serializers.FloatField()
@@ -1,14 +1,27 @@
+from functools import partial
+from django.db import transaction
 from authentication.signals import user_created, otp_created
+from core.delivery import delivery_queue
 
 
 def custom_user_created_handler(sender, token, **kwargs):
-    """we will receive a token here that needs to be sent to the user"""
-    print(token)
+    """
+    we will receive a token here that needs to be sent to the user, queued
+    on commit so a rolled back signup is never delivered
+    """
+    transaction.on_commit(
+        partial(delivery_queue.enqueue, "user_created", token=token)
+    )
 
 
 def custom_otp_created_handler(sender, instance, **kwargs):
     """we will receive a otp here"""
-    print(instance)
+    transaction.on_commit(partial(
+        delivery_queue.enqueue,
+        "otp_created",
+        email=instance.user.email,
+        otp=instance.otp
+    ))
 
 
 user_created.connect(custom_user_created_handler)
@@ -1,3 +1,233 @@
-from django.test import TestCase
+import gzip
+import os
+import shutil
+import tempfile
+from django.core.cache import caches
+from django.db import transaction
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from core.delivery import DeliveryQueue, FileBackend, delivery_queue
+from core.middleware import (
+    CsrfViewMiddleware,
+    XFrameOptionsMiddleware,
+    bypass_api
+)
+from core.scheduler import Job, Scheduler
 
-# Create your tests here.
+
+class SchemaViewTest(TestCase):
+    url = "/api/docs/schema"
+
+    def test_conditional_get(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        res = self.client.get(self.url, headers={"If-None-Match": res["ETag"]})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b"")
+
+    def test_gzip_variant(self):
+        plain = self.client.get(self.url, {"format": "json"})
+        res = self.client.get(
+            self.url,
+            {"format": "json"},
+            headers={"Accept-Encoding": "gzip"}
+        )
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertNotEqual(res["ETag"], plain["ETag"])
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+
+class RecordingMiddleware:
+    """records the paths it and its process_view see"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = []
+        self.views = []
+
+    def __call__(self, request):
+        self.paths.append(request.path)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.views.append(request.path)
+
+
+class APIBypassTest(TestCase):
+    paths = ["/api/profile/", "/api/docs/", "/admin/"]
+
+    def run_middleware(self):
+        middleware = bypass_api("core.tests.RecordingMiddleware")(
+            lambda request: HttpResponse()
+        )
+
+        for path in self.paths:
+            request = RequestFactory().get(path)
+            middleware(request)
+            middleware.process_view(request, None, (), {})
+
+        return middleware
+
+    def test_api_paths_bypass_the_middleware(self):
+        middleware = self.run_middleware()
+
+        self.assertEqual(middleware.paths, ["/api/docs/", "/admin/"])
+        self.assertEqual(middleware.views, ["/api/docs/", "/admin/"])
+
+    @override_settings(
+        API_MIDDLEWARE={**settings.API_MIDDLEWARE, "ENABLED": False}
+    )
+    def test_disabled_runs_every_path(self):
+        middleware = self.run_middleware()
+
+        self.assertEqual(middleware.paths, self.paths)
+        self.assertEqual(middleware.views, self.paths)
+
+    def test_only_existing_hooks_are_added(self):
+        self.assertTrue(hasattr(CsrfViewMiddleware, "process_view"))
+        self.assertFalse(hasattr(XFrameOptionsMiddleware, "process_view"))
+
+    def test_api_responses_skip_the_chain(self):
+        res = self.client.get("/api/profile/")
+        self.assertEqual(res.status_code, 401)
+        self.assertNotIn("X-Frame-Options", res)
+        self.assertFalse(hasattr(res.wsgi_request, "session"))
+
+        res = self.client.get("/api/docs/")
+        self.assertEqual(res["X-Frame-Options"], "DENY")
+        self.assertTrue(hasattr(res.wsgi_request, "session"))
+
+
+class DeliveryQueueTest(TestCase):
+    class Backend:
+        def __init__(self, failures=0):
+            self.failures = failures
+            self.messages = []
+
+        def send_messages(self, messages):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError()
+
+            self.messages.extend(messages)
+
+    def test_failed_batches_are_retried(self):
+        backend = self.Backend(failures=1)
+        delivery = DeliveryQueue(backend, batch_size=2, retry_backoff=0)
+
+        for number in range(3):
+            self.assertTrue(delivery.enqueue("test", number=number))
+
+        delivery.stop()
+
+        self.assertEqual(
+            sorted(
+                message["payload"]["number"] for message in backend.messages
+            ),
+            [0, 1, 2]
+        )
+        stats = delivery.stats()
+        self.assertEqual(stats["delivered"], 3)
+        self.assertEqual(stats["retries"], 1)
+
+    def test_full_queue_drops(self):
+        delivery = DeliveryQueue(self.Backend(), max_size=1, workers=0)
+
+        self.assertTrue(delivery.enqueue("test"))
+        self.assertFalse(delivery.enqueue("test"))
+        self.assertEqual(delivery.stats()["dropped"], 1)
+
+    def test_file_backend_writes_json_lines(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "messages.jsonl")
+
+        FileBackend(path).send_messages([{"kind": "a"}, {"kind": "b"}])
+
+        with open(path) as file:
+            self.assertEqual(
+                file.read(),
+                '{"kind": "a"}\n{"kind": "b"}\n'
+            )
+
+    def test_signup_is_queued_on_commit(self):
+        data = {
+            "email": "user@example.com",
+            "password": "password",
+            "phone": "1234567890",
+            "first_name": "first",
+            "last_name": "last",
+        }
+        enqueued = delivery_queue.stats()["enqueued"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                get_user_model().objects.create(**data)
+                transaction.set_rollback(True)
+
+        self.assertEqual(delivery_queue.stats()["enqueued"], enqueued)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            get_user_model().objects.create(**data)
+
+        self.assertEqual(delivery_queue.stats()["enqueued"], enqueued + 1)
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    "scheduler": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "scheduler-test",
+    },
+})
+class SchedulerTest(TestCase):
+    def setUp(self):
+        caches["scheduler"].clear()
+        self.calls = []
+
+    def job(self):
+        self.calls.append(1)
+        return 3
+
+    def make_scheduler(self, func=None):
+        job = Job("test", func or self.job, 10)
+        return Scheduler([job], cache="scheduler")
+
+    def test_job_runs_once_per_interval(self):
+        scheduler = self.make_scheduler()
+
+        """the first round only schedules the jobs"""
+        self.assertEqual(scheduler.run_pending(now=0), 10)
+        self.assertEqual(scheduler.run_pending(now=5), 5)
+        self.assertEqual(self.calls, [])
+
+        self.assertEqual(scheduler.run_pending(now=10), 10)
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(scheduler.stats()["test"]["last_rows"], 3)
+
+    def test_lock_is_taken_by_one_scheduler(self):
+        schedulers = [self.make_scheduler() for _ in range(3)]
+
+        for scheduler in schedulers:
+            scheduler.run_job(scheduler.jobs["test"])
+
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(
+            [scheduler.stats()["test"]["skipped"] for scheduler in schedulers],
+            [0, 1, 1]
+        )
+
+    def test_failed_job_is_counted(self):
+        def fail():
+            raise RuntimeError()
+
+        scheduler = self.make_scheduler(fail)
+
+        with self.assertLogs("core.scheduler", "ERROR"):
+            scheduler.run_job(scheduler.jobs["test"])
+
+        self.assertEqual(scheduler.stats()["test"]["failed"], 1)
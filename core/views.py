@@ -1,6 +1,26 @@
 from django.shortcuts import HttpResponse
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema
+from authentication.authenticate import CustomAuthentication
+from core.delivery import delivery_queue
+from core.serializer import DeliveryStatsSerializer
 
 
 def root(request):
     """show api is working with this view"""
     return HttpResponse("Api working. All systems running")
+
+
+@extend_schema(tags=["Status"])
+class DeliveryStatsView(GenericAPIView):
+    """queue depth and latency of this worker's notification delivery"""
+
+    serializer_class = DeliveryStatsSerializer
+    authentication_classes = [CustomAuthentication]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        serializer = self.get_serializer(delivery_queue.stats())
+        return Response(serializer.data)
@@ -0,0 +1,41 @@
+from asgiref.sync import sync_to_async
+from userprofile.serializer import UserProfilerSerializer
+from authentication.authenticate import CachedJWTAuthentication
+from rest_framework.permissions import IsAuthenticated
+from core.async_views import AsyncAPIView
+
+
+class ProfileView(AsyncAPIView):
+    """
+    Authentication is awaited, the serializer still runs in a thread as
+    the group and permission fields query the database.
+    """
+
+    serializer_class = UserProfilerSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        return self.response(await sync_to_async(self.retrieve)(request))
+
+    async def put(self, request):
+        return self.response(await sync_to_async(self.update)(request))
+
+    async def patch(self, request):
+        return self.response(
+            await sync_to_async(self.update)(request, partial=True)
+        )
+
+    def retrieve(self, request):
+        return self.get_serializer(request.user).data
+
+    def update(self, request, partial=False):
+        serializer = self.get_serializer(
+            request.user,
+            data=self.data,
+            partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return serializer.data
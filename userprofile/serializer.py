@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth import get_user_model
 
 
@@ -8,13 +9,57 @@ class UserProfilerSerializer(serializers.ModelSerializer):
         fields = "__all__"
         extra_kwargs = {'password': {"write_only": True}}
 
+    def get_fields(self):
+        """emails are unique ignoring case, which validate_email checks"""
+        fields = super().get_fields()
+        fields['email'].validators = [
+            validator for validator in fields['email'].validators
+            if not isinstance(validator, UniqueValidator)
+        ]
+        return fields
+
+    def validate_email(self, value):
+        users = get_user_model().objects.by_email(value)
+
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+
+        if users.exists():
+            field = get_user_model()._meta.get_field('email')
+            raise serializers.ValidationError(
+                field.error_messages['unique'] % {
+                    'model_name': get_user_model()._meta.verbose_name,
+                    'field_label': field.verbose_name,
+                },
+                code='unique'
+            )
+
+        return value
+
     def update(self, instance, validated_data):
-        """update the user model"""
+        """
+        Write only the submitted columns. The instance may be a cached copy
+        of the user, saving every column would revert last_login, is_active
+        and the other columns updated since it was cached.
+        """
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
+        many = {
+            name: validated_data.pop(name)
+            for name in ('groups', 'user_permissions')
+            if name in validated_data
+        }
+        update_fields = [*validated_data, 'date_modified']
+
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
 
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+            update_fields.append('password')
+
+        instance.save(update_fields=update_fields)
+
+        for name, value in many.items():
+            getattr(instance, name).set(value)
 
-        return user
+        return instance
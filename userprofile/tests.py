@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from authentication.cache import user_cache
+from authentication.helper import get_user_tokens
+from userprofile import async_views, views
+from authentication.testing import ViewParityMixin, create_user
+
+
+class ProfileUpdateTest(TestCase):
+    def setUp(self):
+        self.user = create_user(is_active=True)
+        self.headers = {
+            "Authorization":
+                f"Token {get_user_tokens(self.user)['access_token']}"
+        }
+        user_cache.clear()
+
+    def test_patch_keeps_columns_updated_since_cached(self):
+        self.client.get("/api/profile/", headers=self.headers)
+        now = timezone.now()
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            last_login=now
+        )
+
+        res = self.client.patch(
+            "/api/profile/",
+            {"first_name": "changed"},
+            content_type="application/json",
+            headers=self.headers
+        )
+        self.assertEqual(res.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "changed")
+        self.assertEqual(self.user.last_login, now)
+
+    def test_email_taken_in_another_case_is_rejected(self):
+        create_user(email="other@example.com", phone="0987654321")
+
+        res = self.client.patch(
+            "/api/profile/",
+            {"email": "OTHER@example.com"},
+            content_type="application/json",
+            headers=self.headers
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("email", res.json())
+
+        """the user's own email in another case is fine"""
+        res = self.client.patch(
+            "/api/profile/",
+            {"email": "USER@example.com"},
+            content_type="application/json",
+            headers=self.headers
+        )
+        self.assertEqual(res.status_code, 200)
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "profile-view-parity-test",
+    },
+})
+class AsyncProfileViewParityTest(ViewParityMixin, TestCase):
+    """the async profile view answers like the drf view"""
+
+    def setUp(self):
+        self.user = create_user(is_active=True)
+
+    def test_profile(self):
+        token = get_user_tokens(self.user)["access_token"]
+
+        def scenario(view):
+            status, body = self.request(view, "get", token=token)
+            results = [
+                (status, body["email"], sorted(body)),
+                self.request(view, "get"),
+            ]
+            status, body = self.request(
+                view,
+                "patch",
+                {"first_name": "changed"},
+                content_type="application/x-www-form-urlencoded",
+                token=token
+            )
+            results.append((status, body["first_name"]))
+            results.append(self.request(
+                view,
+                "patch",
+                "first_name",
+                content_type="text/plain",
+                token=token
+            ))
+            return results
+
+        self.assertParity(
+            scenario,
+            [views.ProfileView],
+            [async_views.ProfileView]
+        )
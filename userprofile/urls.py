@@ -1,8 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from userprofile.views import ProfileView
+
+if settings.ASYNC_API:
+    from userprofile import async_views as views
+else:
+    from userprofile import views
 
 app_name = 'userprofile'
 
 urlpatterns = [
-    path('', ProfileView.as_view(), name='profile')
+    path('', views.ProfileView.as_view(), name='profile')
 ]
@@ -1,6 +1,6 @@
 from rest_framework.generics import RetrieveUpdateAPIView
 from userprofile.serializer import UserProfilerSerializer
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.authenticate import CachedJWTAuthentication
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema
 
@@ -8,7 +8,7 @@ from drf_spectacular.utils import extend_schema
 @extend_schema(tags=["User Profile"])
 class ProfileView(RetrieveUpdateAPIView):
     serializer_class = UserProfilerSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_object(self):